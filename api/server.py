@@ -0,0 +1,402 @@
+import asyncio, functools, json, re, sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+from setting import CONNECTION_DATABASE, API_HOST, API_PORT, API_WORKERS, API_MAX_BODY, API_MAX_LIMIT
+from db.user_db import UserRepository
+from db.connection import ConnectionManager
+from logic.actions import DictionaryActions, UserActions, BlockActions, TokenValidator
+from logic.auth import TokenService, AuthService
+from logic.hashing import HashingBusyError
+from logic.mailer import outbox_sender
+from logic.rate_limit import ThrottledError
+from logic.revocation import revocation_list_for
+from logic.suggest import suggestions_for
+
+HTTP_REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+connections = ConnectionManager(CONNECTION_DATABASE)
+revocations = revocation_list_for(connections.database)
+
+
+def _cursor():
+    # every executor thread keeps its own connection from the manager
+    return connections.cursor()
+
+
+def _run_action(action_class, method_name, auth, *args, **kwargs):
+    messages = []
+    actions = action_class(_cursor(), output=messages.append)
+    result = getattr(actions, method_name)(*args, auth=auth, **kwargs)
+    return result, messages
+
+
+def _login(username, password, client):
+    cursor = _cursor()
+    user_repo = UserRepository(cursor)
+    return AuthService(user_repo, TokenService(user_repo), cursor).login_user(username, password, client)
+
+
+def _sign_up(username, email, password, client):
+    cursor = _cursor()
+    user_repo = UserRepository(cursor)
+    return AuthService(user_repo, TokenService(user_repo), cursor).sign_in_user(username, email, password, client)
+
+
+def _public_user(user_id, data):
+    return {"id": user_id, "username": data["username"], "email": data["email"], "role": data["role"],
+            "status": data["status"]}
+
+
+def _require(body, *fields):
+    values = []
+    for field in fields:
+        value = body.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise HttpError(400, f"Missing field '{field}'.")
+        values.append(value.strip() if isinstance(value, str) else value)
+    return values
+
+
+def _require_strings(body, *fields):
+    values = _require(body, *fields)
+    for field, value in zip(fields, values):
+        if not isinstance(value, str):
+            raise HttpError(400, f"Field '{field}' must be a string.")
+    return values
+
+
+def _int_field(body, name):
+    value, = _require(body, name)
+    if isinstance(value, bool):
+        raise HttpError(400, f"Field '{name}' must be an integer.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"Field '{name}' must be an integer.")
+
+
+def _int_param(query, name, default, minimum=None, maximum=None):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise HttpError(400, f"Query parameter '{name}' must be an integer.")
+    if minimum is not None and value < minimum:
+        raise HttpError(400, f"Query parameter '{name}' must be at least {minimum}.")
+    if maximum is not None and value > maximum:
+        raise HttpError(400, f"Query parameter '{name}' must be at most {maximum}.")
+    return value
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body, client):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.client = client
+        self.auth = None
+        self.params = ()
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except (ValueError, UnicodeDecodeError):
+            raise HttpError(400, "Request body must be JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object.")
+        return data
+
+
+class ApiServer:
+    def __init__(self, workers=API_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        self._routes = []
+        self._add_route("POST", r"/login", self.login, public=True)
+        self._add_route("POST", r"/signup", self.sign_up, public=True)
+        self._add_route("GET", r"/translate/en/([^/]+)", self.translate_en)
+        self._add_route("GET", r"/translate/fa/([^/]+)", self.translate_fa)
+        self._add_route("POST", r"/translate/batch", self.translate_batch)
+        self._add_route("GET", r"/search", self.search)
+        self._add_route("GET", r"/words", self.list_words)
+        self._add_route("POST", r"/words", self.add_word)
+        self._add_route("PUT", r"/words/(\d+)", self.edit_word)
+        self._add_route("DELETE", r"/words/(\d+)", self.delete_word)
+        self._add_route("GET", r"/users", self.list_users)
+        self._add_route("POST", r"/users", self.create_user)
+        self._add_route("PUT", r"/users/(\d+)/role", self.change_role)
+        self._add_route("GET", r"/users/blocked", self.list_blocked_users)
+        self._add_route("POST", r"/users/(\d+)/block", self.block_user)
+        self._add_route("POST", r"/users/(\d+)/unblock", self.unblock_user)
+
+    def _add_route(self, method, pattern, handler, public=False):
+        self._routes.append((method, re.compile(pattern + r"/?$"), handler, public))
+
+    async def _blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _action(self, request, action_class, method_name, *args, **kwargs):
+        allowed_roles = getattr(action_class, method_name).allowed_roles
+        if request.auth.role not in allowed_roles:
+            raise HttpError(403, "Your role is not allowed to do this.")
+        result, messages = await self._blocking(_run_action, action_class, method_name, request.auth,
+                                                *args, **kwargs)
+        if result == "":
+            # AccessControl's denial, e.g. the token was revoked after the request was authenticated
+            raise HttpError(403, "Your token is no longer allowed to do this.")
+        return result, messages
+
+    @staticmethod
+    def _outcome(result, messages, status=200):
+        if result is True:
+            return status, {"message": messages[-1] if messages else "OK"}
+        return 400, {"error": messages[-1] if messages else "Request failed."}
+
+    async def login(self, request):
+        username, password = _require_strings(request.json(), "username", "password")
+        token = await self._blocking(_login, username, password, request.client)
+        if not token:
+            raise HttpError(401, "Login failed.")
+        return 200, {"token": token}
+
+    async def sign_up(self, request):
+        username, email, password = _require_strings(request.json(), "username", "email", "password")
+        token = await self._blocking(_sign_up, username, email, password, request.client)
+        if not token:
+            raise HttpError(400, "Registration failed.")
+        return 201, {"token": token}
+
+    async def _translate(self, request, method_name):
+        word = unquote(request.params[0]).strip()
+        translations, messages = await self._action(request, DictionaryActions, method_name, word)
+        if not translations:
+            return 404, {"error": "Word not found in dictionary.", "messages": messages}
+        return 200, {"word": word,
+                     "translations": [{"word": key, "author": author} for key, author in translations.items()]}
+
+    async def translate_en(self, request):
+        return await self._translate(request, "show_fa_translations")
+
+    async def translate_fa(self, request):
+        return await self._translate(request, "show_en_translations")
+
+    async def translate_batch(self, request):
+        body = request.json()
+        text, words = body.get("text"), body.get("words")
+        if isinstance(words, list) and all(isinstance(word, str) for word in words):
+            results, messages = await self._action(request, DictionaryActions, "translate_words", words)
+        elif isinstance(text, str):
+            results, messages = await self._action(request, DictionaryActions, "translate_text", text)
+        else:
+            raise HttpError(400, "Send either 'text' or a list of 'words'.")
+        if results is None:
+            raise HttpError(400, messages[-1] if messages else "Nothing to translate.")
+        return 200, {"results": [
+            {"token": result["token"], "language": result["language"],
+             "translations": [{"word": word, "author": author} for word, author in result["translations"].items()]}
+            for result in results
+        ]}
+
+    async def search(self, request):
+        text = request.query.get("q", [""])[0]
+        limit = _int_param(request.query, "limit", 20, minimum=1, maximum=API_MAX_LIMIT)
+        results, _ = await self._action(request, DictionaryActions, "search", text, limit=limit)
+        return 200, {"results": results or []}
+
+    async def list_words(self, request):
+        after_id = _int_param(request.query, "after_id", 0, minimum=0)
+        limit = _int_param(request.query, "limit", 50, minimum=1, maximum=API_MAX_LIMIT)
+        author = request.query.get("author", [None])[0]
+        words, _ = await self._action(request, DictionaryActions, "list_words", after_id, limit, author)
+        words = words or []
+        next_after_id = words[-1]["id"] if words and len(words) == limit else None
+        return 200, {"words": words, "next_after_id": next_after_id}
+
+    async def add_word(self, request):
+        en_word, fa_word = _require_strings(request.json(), "english_word", "persian_word")
+        try:
+            result, messages = await self._action(request, DictionaryActions, "add_new_word", en_word, fa_word,
+                                                  author_username=request.auth.subject)
+        except sqlite3.IntegrityError:
+            raise HttpError(409, "Duplicate value en-word and fa-word!")
+        return self._outcome(result, messages, status=201)
+
+    async def edit_word(self, request):
+        word_id = int(request.params[0])
+        en_word, fa_word = _require_strings(request.json(), "english_word", "persian_word")
+        try:
+            if request.auth.role == "admin":
+                result, messages = await self._action(request, DictionaryActions, "edit_any_word",
+                                                      word_id, en_word, fa_word)
+            else:
+                result, messages = await self._action(request, DictionaryActions, "edit_own_word", word_id,
+                                                      en_word, fa_word, author_username=request.auth.subject)
+        except sqlite3.IntegrityError:
+            raise HttpError(409, "Duplicate value en-word and fa-word!")
+        return self._outcome(result, messages)
+
+    async def delete_word(self, request):
+        word_id = int(request.params[0])
+        if request.auth.role == "admin":
+            result, messages = await self._action(request, DictionaryActions, "delete_any_word", word_id)
+        else:
+            result, messages = await self._action(request, DictionaryActions, "delete_own_word", word_id,
+                                                  author_username=request.auth.subject)
+        return self._outcome(result, messages)
+
+    async def list_users(self, request):
+        users, _ = await self._action(request, UserActions, "show_all_users", request.auth.subject)
+        return 200, {"users": [_public_user(user_id, data) for user_id, data in (users or {}).items()]}
+
+    async def create_user(self, request):
+        body = request.json()
+        username, email, password = _require_strings(body, "username", "email", "password")
+        role_id = _int_field(body, "role_id")
+        result, messages = await self._action(request, UserActions, "create_new_user", username, email, password,
+                                              role_id, current_admin_username=request.auth.subject,
+                                              confirm_admin_downgrade=bool(body.get("confirm_admin_downgrade")))
+        return self._outcome(result, messages, status=201)
+
+    async def change_role(self, request):
+        body = request.json()
+        role_id = _int_field(body, "role_id")
+        result, messages = await self._action(request, UserActions, "change_user_role",
+                                              target_user_id=int(request.params[0]), new_role_id=role_id,
+                                              current_admin_username=request.auth.subject,
+                                              confirm_admin_downgrade=bool(body.get("confirm_admin_downgrade")))
+        return self._outcome(result, messages)
+
+    async def list_blocked_users(self, request):
+        blocked, _ = await self._action(request, BlockActions, "show_blocked_users")
+        return 200, {"users": [{"id": user_id, "username": username} for user_id, username in (blocked or {}).items()]}
+
+    async def block_user(self, request):
+        result, messages = await self._action(request, BlockActions, "block_user_by_id",
+                                              target_user_id=int(request.params[0]),
+                                              current_admin_username=request.auth.subject)
+        return self._outcome(result, messages)
+
+    async def unblock_user(self, request):
+        result, messages = await self._action(request, BlockActions, "unblock_user_by_id",
+                                              target_user_id=int(request.params[0]),
+                                              current_admin_username=request.auth.subject)
+        return self._outcome(result, messages)
+
+    async def dispatch(self, request):
+        allowed = False
+        for method, pattern, handler, public in self._routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            allowed = True
+            if method != request.method:
+                continue
+            request.params = match.groups()
+            if not public:
+                scheme, _, token = request.headers.get("authorization", "").partition(" ")
+                if scheme.lower() == "bearer":
+                    request.auth = TokenValidator.decode(token.strip(), revocations)
+                if request.auth is None:
+                    raise HttpError(401, "Missing or invalid bearer token.")
+            return await handler(request)
+        if allowed:
+            raise HttpError(405, "Method not allowed.")
+        raise HttpError(404, "Not found.")
+
+    async def _respond(self, request):
+        try:
+            return await self.dispatch(request)
+        except HttpError as e:
+            return e.status, {"error": e.message}
+        except ThrottledError as e:
+            return 429, {"error": str(e), "retry_after": e.retry_after}
+        except HashingBusyError:
+            return 503, {"error": "Server is busy, try again later."}
+        except Exception as e:
+            print("[*][api] Error:", e)
+            return 500, {"error": "Internal server error."}
+
+    async def handle_connection(self, reader, writer):
+        client = writer.get_extra_info("peername")
+        client = client[0] if isinstance(client, tuple) else "local"
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > API_MAX_BODY:
+                    await self._write(writer, 413, {"error": "Request body too large."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                url = urlsplit(target)
+                request = Request(method.upper(), url.path, parse_qs(url.query), headers, body, client)
+                status, payload = await self._respond(request)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._write(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=API_HOST, port=API_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving dictionary API on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def run(host=API_HOST, port=API_PORT):
+    suggestions_for(connections.database).start_loading()
+    outbox_sender.start()
+    try:
+        asyncio.run(ApiServer().serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        outbox_sender.stop(timeout=5)
+        connections.close_all()
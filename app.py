@@ -1,7 +1,12 @@
-import sqlite3
 from setting import CONNECTION_DATABASE
 from views.login_view import register_flow
 from views.dashboard_view import main_menu_flow
+from logic.keys import signer
+from db.migrations import apply_migrations
+from db.connection import ConnectionManager
+from logic.hashing import start_password_migration
+from logic.mailer import outbox_sender
+from logic.suggest import suggestions_for
 
 def run_program(cursor):
     while True:
@@ -14,9 +19,15 @@ def run_program(cursor):
             break
 
 if __name__ == "__main__":
-    conn = sqlite3.connect(CONNECTION_DATABASE)
-    cursor = conn.cursor()
+    signer.load()
+    connections = ConnectionManager(CONNECTION_DATABASE)
+    apply_migrations(connections.connection())
+    start_password_migration(CONNECTION_DATABASE)
+    suggestions_for(CONNECTION_DATABASE).start_loading()
+    outbox_sender.start()
+    cursor = connections.cursor()
 
     run_program(cursor)
 
-    conn.close()
+    outbox_sender.stop(timeout=5)
+    connections.close_all()
@@ -0,0 +1,96 @@
+import random
+from db.connection import connect, transaction
+from db.migrations import apply_migrations, get_schema_version
+from db.word_db import WordRepository
+from logic.hashing import password_hasher
+
+BENCH_PASSWORD = "bench-password"
+_OBJECT_ORDER = {"table": 0, "view": 1, "index": 2, "trigger": 3}
+_ENGLISH_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+_PERSIAN_LETTERS = "ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی"
+
+
+def _schema_objects(source_cursor):
+    source_cursor.execute("""
+        SELECT type, name, sql
+        FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+    """)
+    objects = source_cursor.fetchall()
+    # shadow tables are created by their virtual table, copying them would clash
+    virtual_tables = [name for kind, name, sql in objects if sql.upper().startswith("CREATE VIRTUAL TABLE")]
+    objects = [(kind, name, sql) for kind, name, sql in objects
+               if not any(name.startswith(table + "_") and kind == "table" for table in virtual_tables)]
+    return sorted(objects, key=lambda row: _OBJECT_ORDER.get(row[0], 4))
+
+
+def create_scratch_database(source_cursor, path):
+    connection = connect(path)
+    cursor = connection.cursor()
+    for _, _, sql in _schema_objects(source_cursor):
+        cursor.execute(sql)
+    cursor.execute(f"PRAGMA user_version = {get_schema_version(source_cursor)}")
+    source_cursor.execute("SELECT id, role_name FROM roles")
+    cursor.executemany("INSERT INTO roles (id, role_name) VALUES (?, ?)", source_cursor.fetchall())
+    connection.commit()
+    apply_migrations(connection)
+    return connection
+
+
+def random_word(rng, letters, min_length=3, max_length=10):
+    return "".join(rng.choice(letters) for _ in range(rng.randint(min_length, max_length)))
+
+
+def fill_dataset(connection, users, words, seed=1, batch_size=1000):
+    rng = random.Random(seed)
+    cursor = connection.cursor()
+    cursor.execute("SELECT role_name, id FROM roles")
+    role_ids = dict(cursor.fetchall())
+    # one real hash shared by every user keeps generation fast and logins realistic
+    password = password_hasher.make_password_hash(BENCH_PASSWORD)
+    user_rows = []
+    for number in range(users):
+        if number == 0:
+            role = "admin"
+        elif number % 4 == 0:
+            role = "power_user"
+        else:
+            role = "normal_user"
+        user_rows.append((f"bench_user_{number}", f"bench_user_{number}@example.com", password, role_ids[role]))
+    with transaction(cursor):
+        cursor.executemany("INSERT INTO users (username, email, password, role_id) VALUES (?, ?, ?, ?)", user_rows)
+    cursor.execute("SELECT u.id FROM users u JOIN roles r ON u.role_id = r.id WHERE r.role_name = 'power_user'")
+    author_ids = [row[0] for row in cursor.fetchall()] or [None]
+    word_repo = WordRepository(cursor)
+    inserted = 0
+    while inserted < words:
+        rows_by_author = {}
+        for _ in range(min(batch_size, words - inserted)):
+            row = (random_word(rng, _ENGLISH_LETTERS), random_word(rng, _PERSIAN_LETTERS, 2, 8))
+            rows_by_author.setdefault(rng.choice(author_ids), []).append(row)
+        with transaction(cursor):
+            for author_id, rows in rows_by_author.items():
+                inserted += len(word_repo.insert_words(rows, author_id))
+    cursor.close()
+    return {"users": users, "words": inserted, "seed": seed}
+
+
+def sample_dataset(connection, count, seed=1):
+    rng = random.Random(seed)
+    cursor = connection.cursor()
+    cursor.execute("SELECT english_word, persian_word FROM dictionary_entries")
+    entries = cursor.fetchall()
+    cursor.execute("""
+        SELECT u.username, r.role_name
+        FROM users u
+        JOIN roles r ON u.role_id = r.id
+        WHERE u.username LIKE 'bench_user_%'
+    """)
+    users = cursor.fetchall()
+    cursor.close()
+    if not entries or not users:
+        raise Exception("[*][sample_dataset]Database error: dataset is empty")
+    return {
+        "entries": [rng.choice(entries) for _ in range(count)],
+        "users": users,
+    }
@@ -0,0 +1,266 @@
+import json, os, random, sqlite3, tempfile, threading, time
+from contextlib import nullcontext
+from db.connection import connect
+from db.user_db import UserRepository
+from logic.actions import DictionaryActions, UserActions, BlockActions, TokenValidator
+from logic.auth import TokenService, AuthService
+from benchmarks.dataset import BENCH_PASSWORD, create_scratch_database, fill_dataset, sample_dataset
+from benchmarks.timing import summarize, histogram
+
+DEFAULT_MIX = {
+    "translate_en": 40,
+    "translate_fa": 20,
+    "search": 10,
+    "translate_batch": 5,
+    "add_word": 8,
+    "edit_word": 7,
+    "login": 5,
+    "list_users": 2,
+    "block_unblock": 3,
+}
+CONNECTION_MODES = ("per-thread", "shared")
+EDIT_WORDS_PER_VU = 5
+
+
+def parse_mix(value):
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown action '{name}', expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def _is_lock_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def _quiet(_message):
+    pass
+
+
+def _split_normal_users(users):
+    # sessions log in as the first half; the second half are only ever blocked, so no session token gets revoked
+    normal_users = [username for username, role in users if role == "normal_user"]
+    half = (len(normal_users) + 1) // 2
+    return normal_users[:half], normal_users[half:]
+
+
+class VirtualUser:
+    def __init__(self, number, cursor, sample, seed):
+        self.number = number
+        self.cursor = cursor
+        self.rng = random.Random(seed + number)
+        self.entries = sample["entries"]
+        self.counter = 0
+        users = sample["users"]
+        self.admin = next(username for username, role in users if role == "admin")
+        power_users = [username for username, role in users if role == "power_user"]
+        session_users, block_targets = _split_normal_users(users)
+        self.power_user = power_users[number % len(power_users)]
+        self.normal_user = session_users[number % len(session_users)]
+        self.dict_actions = DictionaryActions(cursor, output=_quiet)
+        self.user_actions = UserActions(cursor, output=_quiet)
+        self.block_actions = BlockActions(cursor, output=_quiet)
+        user_repo = UserRepository(cursor)
+        token_service = TokenService(user_repo)
+        self.auth_service = AuthService(user_repo, token_service, cursor)
+        # one login per session, like the dashboard: decode once and reuse the context
+        tokens = token_service.build_tokens([self.admin, self.power_user, self.normal_user])
+        self.auth = {username: TokenValidator.decode(token, self.dict_actions.revocations)
+                     for username, token in tokens.items()}
+        self.block_target = None
+        if number < len(block_targets):
+            self.block_target = user_repo.get_user_id_by_username(block_targets[number])
+        # edit_word only touches words this session added, so the sampled lookups keep finding theirs
+        own_words = [self._unique_word() for _ in range(EDIT_WORDS_PER_VU)]
+        for word in own_words:
+            self.dict_actions.add_new_word(word, word, author_username=self.power_user,
+                                           auth=self.auth[self.power_user])
+        cursor.execute("SELECT id FROM dictionary_entries WHERE english_word IN (SELECT value FROM json_each(?))",
+                       (json.dumps(own_words),))
+        self.own_word_ids = [row[0] for row in cursor.fetchall()]
+
+    def _unique_word(self):
+        self.counter += 1
+        return f"load_{self.number}_{self.counter}_{time.time_ns()}"
+
+    def translate_en(self):
+        en_word = self.rng.choice(self.entries)[0]
+        return self.dict_actions.show_fa_translations(en_word, auth=self.auth[self.normal_user])
+
+    def translate_fa(self):
+        fa_word = self.rng.choice(self.entries)[1]
+        return self.dict_actions.show_en_translations(fa_word, auth=self.auth[self.normal_user])
+
+    def search(self):
+        text = self.rng.choice(self.entries)[0][:3]
+        return self.dict_actions.search(text, auth=self.auth[self.normal_user])
+
+    def translate_batch(self):
+        words = [self.rng.choice(self.entries)[0] for _ in range(20)]
+        return self.dict_actions.translate_words(words, auth=self.auth[self.normal_user])
+
+    def add_word(self):
+        word = self._unique_word()
+        return self.dict_actions.add_new_word(word, word, author_username=self.power_user,
+                                              auth=self.auth[self.power_user])
+
+    def edit_word(self):
+        if not self.own_word_ids:
+            return self.add_word()
+        word = self._unique_word()
+        return self.dict_actions.edit_own_word(self.rng.choice(self.own_word_ids), word, word,
+                                               author_username=self.power_user, auth=self.auth[self.power_user])
+
+    def login(self):
+        return self.auth_service.login_user(self.normal_user, BENCH_PASSWORD)
+
+    def list_users(self):
+        return self.user_actions.show_all_users(current_username=self.admin, auth=self.auth[self.admin])
+
+    def block_unblock(self):
+        blocked = self.block_actions.block_user_by_id(target_user_id=self.block_target,
+                                                      current_admin_username=self.admin, auth=self.auth[self.admin])
+        unblocked = self.block_actions.unblock_user_by_id(target_user_id=self.block_target,
+                                                          current_admin_username=self.admin,
+                                                          auth=self.auth[self.admin])
+        return blocked and unblocked
+
+
+class LoadSimulator:
+    def __init__(self, database, sample, vus=8, mix=None, mode="per-thread", busy_timeout_ms=None, think_ms=0,
+                 seed=1):
+        if mode not in CONNECTION_MODES:
+            raise ValueError(f"Unknown connection mode '{mode}'")
+        self.database = database
+        self.sample = sample
+        self.vus = vus
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.mode = mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self.think_ms = think_ms
+        self.seed = seed
+        if "block_unblock" in self.mix and vus > len(_split_normal_users(sample["users"])[1]):
+            raise ValueError("block_unblock needs a dedicated normal user per virtual user, generate more users")
+
+    def _connect(self, shared=False):
+        connection = connect(self.database, shared)
+        if self.busy_timeout_ms is not None:
+            connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return connection
+
+    def _worker(self, number, shared_connection, shared_lock, ready, stop, records):
+        # in shared mode every session queues behind one connection, like the CLI
+        guard = shared_lock or nullcontext()
+        try:
+            connection = shared_connection or self._connect()
+            with guard:
+                vu = VirtualUser(number, connection.cursor(), self.sample, self.seed)
+        except BaseException:
+            ready.abort()
+            raise
+        try:
+            self._run_actions(vu, guard, ready, stop, records)
+        finally:
+            if shared_connection is None:
+                connection.close()
+
+    def _run_actions(self, vu, guard, ready, stop, records):
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        ready.wait()
+        while not stop.is_set():
+            name = vu.rng.choices(names, weights)[0]
+            record = records.setdefault(name, {"samples": [], "errors": 0, "locked": 0})
+            began = time.perf_counter()
+            try:
+                with guard:
+                    result = getattr(vu, name)()
+            except sqlite3.OperationalError as e:
+                record["locked" if _is_lock_error(e) else "errors"] += 1
+                continue
+            except Exception:
+                record["errors"] += 1
+                continue
+            if not result:
+                # denied, revoked or nothing found: a fast failure must not count as a fast success
+                record["errors"] += 1
+                continue
+            record["samples"].append(time.perf_counter() - began)
+            if self.think_ms:
+                time.sleep(self.think_ms / 1000)
+
+    def run(self, duration):
+        shared_connection = self._connect(shared=True) if self.mode == "shared" else None
+        shared_lock = threading.Lock() if shared_connection is not None else None
+        ready, stop = threading.Barrier(self.vus + 1), threading.Event()
+        records = [{} for _ in range(self.vus)]
+        threads = [
+            threading.Thread(target=self._worker, name=f"vu-{number}", daemon=True,
+                             args=(number, shared_connection, shared_lock, ready, stop, records[number]))
+            for number in range(self.vus)
+        ]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        began = time.perf_counter()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        if shared_connection is not None:
+            shared_connection.close()
+        return self._report(records, elapsed)
+
+    def _report(self, records, elapsed):
+        merged = {}
+        for record in records:
+            for name, values in record.items():
+                target = merged.setdefault(name, {"samples": [], "errors": 0, "locked": 0})
+                target["samples"].extend(values["samples"])
+                target["errors"] += values["errors"]
+                target["locked"] += values["locked"]
+        actions = {}
+        for name, values in sorted(merged.items()):
+            stats = summarize(values["samples"])
+            stats["throughput_per_sec"] = round(len(values["samples"]) / elapsed, 1)
+            stats["errors"] = values["errors"]
+            stats["locked"] = values["locked"]
+            stats["histogram"] = histogram(values["samples"])
+            actions[name] = stats
+        completed = sum(len(values["samples"]) for values in merged.values())
+        return {
+            "vus": self.vus,
+            "mode": self.mode,
+            "busy_timeout_ms": self.busy_timeout_ms,
+            "think_ms": self.think_ms,
+            "mix": self.mix,
+            "seconds": round(elapsed, 3),
+            "completed": completed,
+            "throughput_per_sec": round(completed / elapsed, 1),
+            "errors": sum(values["errors"] for values in merged.values()),
+            "locked": sum(values["locked"] for values in merged.values()),
+            "actions": actions,
+        }
+
+
+def run_load_test(source_cursor, vus=8, duration=10, mix=None, mode="per-thread", busy_timeout_ms=None, think_ms=0,
+                  users=200, words=20000, seed=1, database=None):
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        path = database or os.path.join(scratch_dir, "load.db")
+        if not os.path.exists(path):
+            connection = create_scratch_database(source_cursor, path)
+            fill_dataset(connection, users, words, seed)
+        else:
+            connection = connect(path)
+        sample = sample_dataset(connection, 1000, seed)
+        connection.close()
+        simulator = LoadSimulator(path, sample, vus, mix, mode, busy_timeout_ms, think_ms, seed)
+        return simulator.run(duration)
@@ -0,0 +1,204 @@
+import json, os, platform, sqlite3, tempfile, time
+from datetime import datetime, timezone
+from db.connection import transaction
+from db.translation_cache import TranslationCache
+from db.user_db import UserRepository
+from db.word_db import WordRepository
+from logic.actions import TokenValidator, verified_tokens
+from logic.auth import TokenService, AuthService
+from logic.hashing import password_hasher
+from benchmarks.dataset import BENCH_PASSWORD, create_scratch_database, fill_dataset, sample_dataset
+from benchmarks.timing import measure
+
+
+class MicroBenchmarks:
+    def __init__(self, connection, sample, repeat=1000, slow_repeat=10):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.sample = sample
+        self.repeat = repeat
+        self.slow_repeat = slow_repeat
+        self.user_repo = UserRepository(self.cursor)
+        self.token_service = TokenService(self.user_repo)
+        self.cases = {
+            "word_lookup_en": self.word_lookup_en,
+            "word_lookup_en_cached": self.word_lookup_en_cached,
+            "word_lookup_fa": self.word_lookup_fa,
+            "translate_batch_200": self.translate_batch,
+            "word_insert": self.word_insert,
+            "get_all_words_with_authors": self.get_all_words_with_authors,
+            "get_all_users": self.get_all_users,
+            "build_token": self.build_token,
+            "token_encode_v1": self.token_encode_v1,
+            "token_encode_v2": self.token_encode_v2,
+            "token_parse_v1": self.token_parse_v1,
+            "token_parse_v2": self.token_parse_v2,
+            "is_token_valid_uncached": self.is_token_valid_uncached,
+            "is_token_valid_cached": self.is_token_valid_cached,
+            "bcrypt_login": self.bcrypt_login,
+        }
+
+    def _english_words(self):
+        return [entry[0] for entry in self.sample["entries"][:self.repeat]]
+
+    def _persian_words(self):
+        return [entry[1] for entry in self.sample["entries"][:self.repeat]]
+
+    def _usernames(self, count):
+        users = self.sample["users"]
+        return [users[i % len(users)][0] for i in range(count)]
+
+    def word_lookup_en(self):
+        word_repo = WordRepository(self.cursor)
+        return measure(word_repo.get_fa_translations_by_en_word, self._english_words())
+
+    def word_lookup_en_cached(self):
+        word_repo = WordRepository(self.cursor, cache=TranslationCache())
+        words = self._english_words()
+        return measure(word_repo.get_fa_translations_by_en_word, words, warmup=len(words))
+
+    def word_lookup_fa(self):
+        word_repo = WordRepository(self.cursor)
+        return measure(word_repo.get_en_translations_by_fa_word, self._persian_words())
+
+    def translate_batch(self):
+        word_repo = WordRepository(self.cursor)
+        entries = self.sample["entries"]
+        batches = []
+        for start in range(self.slow_repeat):
+            chunk = [entries[(start * 200 + i) % len(entries)] for i in range(200)]
+            batches.append(([entry[0] for entry in chunk], [entry[1] for entry in chunk]))
+        return measure(lambda batch: word_repo.get_translations_for_words(*batch), batches)
+
+    def word_insert(self):
+        # one transaction per word, the way the dashboard adds them
+        word_repo = WordRepository(self.cursor)
+        author = next(username for username, role in self.sample["users"] if role == "power_user")
+        prefix = f"bench_insert_{time.time_ns()}_"
+
+        def insert(number):
+            with transaction(self.cursor):
+                word_repo.insert_word(f"{prefix}{number}", f"{prefix}{number}", author)
+
+        return measure(insert, list(range(self.repeat)))
+
+    def get_all_words_with_authors(self):
+        word_repo = WordRepository(self.cursor)
+        return measure(lambda _: word_repo.get_all_words_with_authors(), list(range(self.slow_repeat)))
+
+    def get_all_users(self):
+        return measure(lambda _: self.user_repo.get_all_users(), list(range(self.slow_repeat)))
+
+    def build_token(self):
+        return measure(self.token_service.build_token, self._usernames(self.repeat))
+
+    def _token_claims(self):
+        claims = self.user_repo.get_token_claims(self._usernames(min(self.repeat, len(self.sample["users"]))))
+        claims = list(claims.items())
+        return [claims[i % len(claims)] for i in range(self.repeat)]
+
+    @staticmethod
+    def _with_token_length(result, tokens):
+        result["token_length"] = round(sum(len(token) for token in tokens) / len(tokens), 1)
+        return result
+
+    def _token_encode(self, token_format):
+        now = int(time.time())
+        encode = lambda claim: TokenService._encode_token(claim[0], claim[1][0], claim[1][1], now, token_format)
+        claims = self._token_claims()
+        return self._with_token_length(measure(encode, claims), [encode(claim) for claim in claims[:100]])
+
+    def _token_parse(self, token_format):
+        # split and decode only; the signature check costs the same for both formats
+        now = int(time.time())
+        tokens = [TokenService._encode_token(username, role, generation, now, token_format)
+                  for username, (role, generation) in self._token_claims()]
+        return self._with_token_length(measure(TokenValidator._parse, tokens), tokens)
+
+    def token_encode_v1(self):
+        return self._token_encode("v1")
+
+    def token_encode_v2(self):
+        return self._token_encode("v2")
+
+    def token_parse_v1(self):
+        return self._token_parse("v1")
+
+    def token_parse_v2(self):
+        return self._token_parse("v2")
+
+    def _tokens(self):
+        tokens = self.token_service.build_tokens(self._usernames(min(self.repeat, len(self.sample["users"]))))
+        tokens = list(tokens.values())
+        return [tokens[i % len(tokens)] for i in range(self.repeat)]
+
+    def _measure_validation(self, validate, tokens, warmup=0):
+        for token in tokens[:warmup]:
+            TokenValidator.is_token_valid(token)
+        checks_before = TokenValidator.signature_checks
+        result = measure(validate, tokens)
+        result["signature_checks_per_call"] = round(
+            (TokenValidator.signature_checks - checks_before) / len(tokens), 4)
+        return result
+
+    def is_token_valid_uncached(self):
+        def validate(token):
+            verified_tokens.clear()
+            TokenValidator.is_token_valid(token)
+
+        return self._measure_validation(validate, self._tokens())
+
+    def is_token_valid_cached(self):
+        tokens = self._tokens()
+        verified_tokens.clear()
+        return self._measure_validation(TokenValidator.is_token_valid, tokens, warmup=len(tokens))
+
+    def bcrypt_login(self):
+        auth_service = AuthService(self.user_repo, self.token_service, self.cursor)
+        result = measure(lambda username: auth_service.login_user(username, BENCH_PASSWORD),
+                         self._usernames(self.slow_repeat))
+        result["bcrypt_rounds"] = password_hasher.rounds
+        return result
+
+    def run(self, names=None, progress=None):
+        results = {}
+        for name, case in self.cases.items():
+            if names and name not in names:
+                continue
+            results[name] = case()
+            if progress:
+                progress(name, results[name])
+        return results
+
+
+def run_benchmarks(source_cursor, users=1000, words=50000, repeat=1000, slow_repeat=10, seed=1,
+                   database=None, names=None, progress=None):
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        path = database or os.path.join(scratch_dir, "bench.db")
+        if os.path.exists(path):
+            raise Exception("[*][run_benchmarks]Config error: scratch database already exists")
+        connection = create_scratch_database(source_cursor, path)
+        try:
+            started = time.perf_counter()
+            dataset = fill_dataset(connection, users, words, seed)
+            dataset["generate_seconds"] = round(time.perf_counter() - started, 3)
+            sample = sample_dataset(connection, repeat, seed)
+            suite = MicroBenchmarks(connection, sample, repeat, slow_repeat)
+            results = suite.run(names, progress)
+        finally:
+            connection.close()
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "dataset": dataset,
+        "repeat": repeat,
+        "slow_repeat": slow_repeat,
+        "results": results,
+    }
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,52 @@
+import time
+
+HISTOGRAM_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    # samples are durations in seconds
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "runs": len(ordered),
+        "total_s": round(total, 6),
+        "mean_ms": round(total / len(ordered) * 1000, 4) if ordered else 0.0,
+        "min_ms": round(percentile(ordered, 0) * 1000, 4),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(percentile(ordered, 1) * 1000, 4),
+        "ops_per_sec": round(len(ordered) / total, 1) if total else 0.0,
+    }
+
+
+def measure(func, inputs, warmup=0):
+    for value in inputs[:warmup]:
+        func(value)
+    samples = []
+    for value in inputs:
+        start = time.perf_counter()
+        func(value)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def histogram(samples, buckets=HISTOGRAM_BUCKETS_MS):
+    counts = [0] * (len(buckets) + 1)
+    for sample in samples:
+        ms = sample * 1000
+        for index, bound in enumerate(buckets):
+            if ms <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={bound}ms" for bound in buckets] + [f">{buckets[-1]}ms"]
+    return dict(zip(labels, counts))
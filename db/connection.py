@@ -0,0 +1,85 @@
+import os, sqlite3, threading
+from contextlib import contextmanager
+from setting import CONNECTION_DATABASE, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHED_STATEMENTS, SQLITE_MMAP_SIZE
+from db.instrumentation import query_stats, InstrumentedConnection
+
+
+def configure_connection(connection):
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    return connection
+
+
+class Connection(sqlite3.Connection):
+    # remembers the file it was opened on, so per-database state can follow a cursor
+    database = None
+
+
+def connect(database=CONNECTION_DATABASE, shared=False):
+    # plain connections unless QUERY_STATS_PATH is set, so instrumentation costs nothing when off;
+    # sqlite3's same-thread check stays on unless the caller serializes access across threads itself
+    factory = InstrumentedConnection if query_stats.enabled else Connection
+    connection = sqlite3.connect(database, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, factory=factory,
+                                 cached_statements=SQLITE_CACHED_STATEMENTS, check_same_thread=not shared)
+    connection.database = database
+    return configure_connection(connection)
+
+
+def database_key(database):
+    # per-database state is keyed by the absolute path, so relative and absolute names meet
+    return os.path.abspath(database) if database not in ("", ":memory:") else database
+
+
+def cursor_database(cursor):
+    connection = getattr(cursor, "connection", cursor)
+    database = getattr(connection, "database", None)
+    if database is None:
+        # not opened through connect()
+        database = connection.execute("PRAGMA database_list").fetchone()[2]
+    return database
+
+
+class ConnectionManager:
+    # one connection per thread; in WAL mode readers keep going while another connection writes
+    def __init__(self, database=CONNECTION_DATABASE):
+        self.database = database
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = connect(self.database)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append((threading.get_ident(), connection))
+        return connection
+
+    def cursor(self):
+        return self.connection().cursor()
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        self._local = threading.local()
+        current = threading.get_ident()
+        for owner, connection in connections:
+            # other threads' connections can only be closed from their own thread; with every
+            # reference dropped, sqlite3 closes them when they are collected
+            if owner == current:
+                connection.close()
+
+
+@contextmanager
+def transaction(cursor):
+    connection = getattr(cursor, "connection", cursor)
+    try:
+        yield cursor
+    except BaseException:
+        connection.rollback()
+        raise
+    connection.commit()
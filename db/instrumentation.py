@@ -0,0 +1,141 @@
+import atexit, json, sqlite3, sys, threading, time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from setting import QUERY_STATS_PATH
+
+NO_ACTION = "-"
+current_action = ContextVar("current_action", default=NO_ACTION)
+
+
+class QueryStats:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._sites = {}
+        self._action_calls = {}
+
+    @contextmanager
+    def action(self, name):
+        if not self.enabled:
+            yield
+            return
+        token = current_action.set(name)
+        with self._lock:
+            self._action_calls[name] = self._action_calls.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            current_action.reset(token)
+
+    def record(self, site, queries, seconds, rows):
+        key = (current_action.get(), site)
+        with self._lock:
+            entry = self._sites.get(key)
+            if entry is None:
+                entry = self._sites[key] = [0, 0.0, 0]
+            entry[0] += queries
+            entry[1] += seconds
+            entry[2] += rows
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+            self._action_calls.clear()
+
+    def snapshot(self):
+        with self._lock:
+            sites = {key: list(value) for key, value in self._sites.items()}
+            action_calls = dict(self._action_calls)
+        actions = {}
+        for (action, site), (queries, seconds, rows) in sorted(sites.items()):
+            summary = actions.setdefault(action, {"calls": action_calls.get(action, 0), "queries": 0, "seconds": 0.0,
+                                                  "rows": 0, "sites": {}})
+            summary["queries"] += queries
+            summary["seconds"] += seconds
+            summary["rows"] += rows
+            summary["sites"][site] = {"queries": queries, "seconds": round(seconds, 6), "rows": rows}
+        for action, summary in actions.items():
+            summary["seconds"] = round(summary["seconds"], 6)
+            if summary["calls"]:
+                summary["queries_per_call"] = round(summary["queries"] / summary["calls"], 2)
+        return actions
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        def label(value):
+            return value.replace("\\", "\\\\").replace('"', '\\"')
+
+        lines = []
+        metrics = (("queries", "dictionary_db_queries_total", "Queries executed per action and call site."),
+                   ("seconds", "dictionary_db_query_seconds_total", "Time spent executing and fetching."),
+                   ("rows", "dictionary_db_rows_total", "Rows fetched per action and call site."))
+        snapshot = self.snapshot()
+        for field, metric, description in metrics:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for action, summary in snapshot.items():
+                for site, values in summary["sites"].items():
+                    lines.append(f'{metric}{{action="{label(action)}",site="{label(site)}"}} {values[field]}')
+        lines.append("# HELP dictionary_action_calls_total Calls per AccessControl action.")
+        lines.append("# TYPE dictionary_action_calls_total counter")
+        for action, summary in snapshot.items():
+            if action != NO_ACTION:
+                lines.append(f'dictionary_action_calls_total{{action="{label(action)}"}} {summary["calls"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        content = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _site = NO_ACTION
+
+    def _timed(self, method, sql, parameters):
+        caller = sys._getframe(2)
+        self._site = f"{caller.f_code.co_qualname}:{caller.f_lineno}"
+        start = time.perf_counter()
+        try:
+            return method(self, sql, parameters)
+        finally:
+            query_stats.record(self._site, 1, time.perf_counter() - start, 0)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(sqlite3.Cursor.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(sqlite3.Cursor.executemany, sql, seq_of_parameters)
+
+    def _fetched(self, rows, start):
+        query_stats.record(self._site, 0, time.perf_counter() - start, rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), start)
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+query_stats = QueryStats(enabled=bool(QUERY_STATS_PATH))
+if query_stats.enabled:
+    atexit.register(query_stats.write, QUERY_STATS_PATH)
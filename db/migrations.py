@@ -0,0 +1,169 @@
+def _add_user_status(cursor):
+    cursor.execute("""
+        ALTER TABLE users
+        ADD COLUMN status TEXT NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'blocked'))
+    """)
+    # blocked users used to be marked with a "!:" prefix on the password hash (stored as TEXT or BLOB)
+    cursor.execute("""
+        UPDATE users
+        SET status = 'blocked', password = substr(password, 3)
+        WHERE CAST(substr(password, 1, 2) AS TEXT) = '!:'
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_blocked ON users (id) WHERE status = 'blocked'")
+
+
+def _add_dictionary_fts(cursor):
+    cursor.execute("""
+        CREATE VIRTUAL TABLE dictionary_fts USING fts5(
+            english_word,
+            persian_word,
+            content = 'dictionary_entries',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER dictionary_fts_ai AFTER INSERT ON dictionary_entries BEGIN
+            INSERT INTO dictionary_fts (rowid, english_word, persian_word)
+            VALUES (new.id, new.english_word, new.persian_word);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER dictionary_fts_ad AFTER DELETE ON dictionary_entries BEGIN
+            INSERT INTO dictionary_fts (dictionary_fts, rowid, english_word, persian_word)
+            VALUES ('delete', old.id, old.english_word, old.persian_word);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER dictionary_fts_au AFTER UPDATE OF english_word, persian_word ON dictionary_entries BEGIN
+            INSERT INTO dictionary_fts (dictionary_fts, rowid, english_word, persian_word)
+            VALUES ('delete', old.id, old.english_word, old.persian_word);
+            INSERT INTO dictionary_fts (rowid, english_word, persian_word)
+            VALUES (new.id, new.english_word, new.persian_word);
+        END
+    """)
+    cursor.execute("INSERT INTO dictionary_fts (dictionary_fts) VALUES ('rebuild')")
+
+
+def _add_dictionary_author_index(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictionary_entries_author ON dictionary_entries (author_id, id)")
+
+
+def _add_dictionary_persian_index(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictionary_entries_persian ON dictionary_entries (persian_word)")
+
+
+def _add_email_outbox(cursor):
+    cursor.execute("""
+        CREATE TABLE email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox (next_attempt_at)
+        WHERE status = 'pending'
+    """)
+
+
+def _add_password_reset_codes(cursor):
+    cursor.execute("""
+        CREATE TABLE password_reset_codes (
+            email TEXT PRIMARY KEY,
+            code_hash TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            verified INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_password_reset_codes_expires ON password_reset_codes (expires_at)")
+
+
+def _add_token_revocations(cursor):
+    cursor.execute("ALTER TABLE users ADD COLUMN token_generation INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("""
+        CREATE TABLE token_revocations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            generation INTEGER NOT NULL,
+            revoked_at REAL NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_token_revocations_revoked_at ON token_revocations (revoked_at)")
+    # tokens carry the generation they were issued with; a role or status change makes older ones stale
+    cursor.execute("""
+        CREATE TRIGGER users_token_generation_au AFTER UPDATE OF role_id, status ON users
+        WHEN old.role_id IS NOT new.role_id OR old.status IS NOT new.status BEGIN
+            UPDATE users SET token_generation = old.token_generation + 1 WHERE id = new.id;
+            INSERT INTO token_revocations (username, generation, revoked_at)
+            VALUES (new.username, old.token_generation + 1, (julianday('now') - 2440587.5) * 86400.0);
+        END
+    """)
+
+
+def _add_dictionary_lookup_keys(cursor):
+    # the same rules as logic.text.normalize_persian at the time of writing: Arabic yeh, alef maksura and kaf
+    # become their Persian forms, tatweel and diacritics are dropped
+    persian_key = "persian_word"
+    for source, target in ((0x064a, 0x06cc), (0x0649, 0x06cc), (0x0643, 0x06a9)):
+        persian_key = f"replace({persian_key}, char({source}), char({target}))"
+    for source in (0x0640, *range(0x064b, 0x0653), 0x0670):
+        persian_key = f"replace({persian_key}, char({source}), '')"
+    cursor.execute(f"""
+        ALTER TABLE dictionary_entries
+        ADD COLUMN persian_key TEXT GENERATED ALWAYS AS ({persian_key}) VIRTUAL
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictionary_entries_persian_key ON dictionary_entries (persian_key)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_dictionary_entries_english_lower
+        ON dictionary_entries (lower(english_word))
+    """)
+
+
+def _add_email_outbox_expiry(cursor):
+    # messages carrying a reset code must not outlive the code
+    cursor.execute("ALTER TABLE email_outbox ADD COLUMN expires_at REAL")
+
+
+MIGRATIONS = [
+    _add_user_status,
+    _add_dictionary_fts,
+    _add_dictionary_author_index,
+    _add_dictionary_persian_index,
+    _add_email_outbox,
+    _add_password_reset_codes,
+    _add_token_revocations,
+    _add_dictionary_lookup_keys,
+    _add_email_outbox_expiry,
+]
+
+
+def get_schema_version(cursor):
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+
+def apply_migrations(connection):
+    cursor = connection.cursor()
+    version = get_schema_version(cursor)
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        try:
+            cursor.execute("BEGIN")
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    cursor.close()
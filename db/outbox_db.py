@@ -0,0 +1,70 @@
+OUTBOX_STATUS_PENDING = "pending"
+OUTBOX_STATUS_SENT = "sent"
+OUTBOX_STATUS_FAILED = "failed"
+
+
+class OutboxRepository:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def enqueue(self, recipient, subject, body, now, expires_at=None):
+        self._cursor.execute("""
+            INSERT INTO email_outbox (recipient, subject, body, next_attempt_at, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (recipient, subject, body, now, now, expires_at))
+        return self._cursor.lastrowid
+
+    def get_due_messages(self, now, limit):
+        self._cursor.execute("""
+            SELECT id, recipient, subject, body, attempts
+            FROM email_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ? AND (expires_at IS NULL OR expires_at > ?)
+            ORDER BY next_attempt_at
+            LIMIT ?
+        """, (now, now, limit))
+        rows = self._cursor.fetchall()
+        return [
+            {
+                "id": row[0],
+                "recipient": row[1],
+                "subject": row[2],
+                "body": row[3],
+                "attempts": row[4]
+            }
+            for row in rows
+        ]
+
+    def mark_sent(self, message_ids, now):
+        # the body can hold a reset code, it is not kept once delivered
+        self._cursor.executemany("""
+            UPDATE email_outbox
+            SET status = 'sent', body = '', attempts = attempts + 1, sent_at = ?, last_error = NULL
+            WHERE id = ?
+        """, [(now, message_id) for message_id in message_ids])
+
+    def mark_retry(self, message_id, next_attempt_at, error):
+        self._cursor.execute("""
+            UPDATE email_outbox
+            SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+        """, (next_attempt_at, error, message_id))
+
+    def mark_failed(self, message_id, error):
+        self._cursor.execute("""
+            UPDATE email_outbox
+            SET status = 'failed', body = '', attempts = attempts + 1, last_error = ?
+            WHERE id = ?
+        """, (error, message_id))
+
+    def expire_messages(self, now):
+        # undelivered messages past their expiry are dropped, body included
+        self._cursor.execute("""
+            UPDATE email_outbox
+            SET status = 'failed', body = '', last_error = 'expired'
+            WHERE status = 'pending' AND expires_at <= ?
+        """, (now,))
+        return self._cursor.rowcount
+
+    def count_by_status(self):
+        self._cursor.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")
+        return dict(self._cursor.fetchall())
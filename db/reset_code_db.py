@@ -0,0 +1,41 @@
+class ResetCodeRepository:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def upsert_code(self, email, code_hash, expires_at):
+        self._cursor.execute("""
+            INSERT INTO password_reset_codes (email, code_hash, expires_at, attempts, verified)
+            VALUES (?, ?, ?, 0, 0)
+            ON CONFLICT (email) DO UPDATE
+            SET code_hash = excluded.code_hash, expires_at = excluded.expires_at, attempts = 0, verified = 0
+        """, (email, code_hash, expires_at))
+
+    def count_attempt(self, email, now):
+        # one atomic statement, so concurrent guesses can't share an attempt
+        self._cursor.execute("""
+            UPDATE password_reset_codes
+            SET attempts = attempts + 1
+            WHERE email = ? AND expires_at > ?
+            RETURNING code_hash, attempts
+        """, (email, now))
+        rows = self._cursor.fetchall()
+        if not rows:
+            return None
+        return {"code_hash": rows[0][0], "attempts": rows[0][1]}
+
+    def mark_verified(self, email):
+        self._cursor.execute("UPDATE password_reset_codes SET verified = 1 WHERE email = ?", (email,))
+
+    def consume_verified(self, email, now):
+        self._cursor.execute("""
+            DELETE FROM password_reset_codes
+            WHERE email = ? AND verified = 1 AND expires_at > ?
+        """, (email, now))
+        return self._cursor.rowcount > 0
+
+    def delete_code(self, email):
+        self._cursor.execute("DELETE FROM password_reset_codes WHERE email = ?", (email,))
+
+    def delete_expired(self, now):
+        self._cursor.execute("DELETE FROM password_reset_codes WHERE expires_at <= ?", (now,))
+        return self._cursor.rowcount
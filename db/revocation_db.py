@@ -0,0 +1,29 @@
+class RevocationRepository:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def get_last_revocation_id(self):
+        self._cursor.execute("SELECT COALESCE(MAX(id), 0) FROM token_revocations")
+        return self._cursor.fetchone()[0]
+
+    def get_revocations_after(self, after_id):
+        self._cursor.execute("""
+            SELECT id, username, generation, revoked_at
+            FROM token_revocations
+            WHERE id > ?
+            ORDER BY id
+        """, (after_id,))
+        return self._cursor.fetchall()
+
+    def get_revocations_since(self, since, up_to_id):
+        self._cursor.execute("""
+            SELECT id, username, generation, revoked_at
+            FROM token_revocations
+            WHERE revoked_at >= ? AND id <= ?
+            ORDER BY id
+        """, (since, up_to_id))
+        return self._cursor.fetchall()
+
+    def delete_revocations_before(self, before):
+        self._cursor.execute("DELETE FROM token_revocations WHERE revoked_at < ?", (before,))
+        return self._cursor.rowcount
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+from setting import TRANSLATION_CACHE_SIZE
+
+MISSING = object()
+
+
+class FrequencySketch:
+    # count-min sketch with periodic halving, so old popularity fades out
+    def __init__(self, capacity, depth=4, max_count=15):
+        width = 1
+        while width < max(capacity, 16) * 2:
+            width <<= 1
+        self._mask = width - 1
+        self._depth = depth
+        self._max_count = max_count
+        self._table = [[0] * width for _ in range(depth)]
+        self._additions = 0
+        self._reset_after = max(capacity, 16) * 10
+
+    def _slots(self, key):
+        return [hash((seed, key)) & self._mask for seed in range(self._depth)]
+
+    def increment(self, key):
+        for row, slot in zip(self._table, self._slots(key)):
+            if row[slot] < self._max_count:
+                row[slot] += 1
+        self._additions += 1
+        if self._additions >= self._reset_after:
+            for row in self._table:
+                for i, value in enumerate(row):
+                    row[i] = value >> 1
+            self._additions //= 2
+
+    def estimate(self, key):
+        return min(row[slot] for row, slot in zip(self._table, self._slots(key)))
+
+
+class TranslationCache:
+    def __init__(self, capacity=TRANSLATION_CACHE_SIZE):
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._sketch = FrequencySketch(capacity)
+        self._lock = threading.Lock()
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self.stale_puts = 0
+
+    def get(self, key):
+        with self._lock:
+            self._sketch.increment(key)
+            value = self._entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, epoch=None):
+        # epoch is the value read before the query; a write invalidated since then makes the result stale
+        if self._capacity <= 0:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                self.stale_puts += 1
+                return
+            if key in self._entries:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                return
+            if len(self._entries) >= self._capacity:
+                # admit the newcomer only if it is looked up more often than the LRU victim
+                victim = next(iter(self._entries))
+                if self._sketch.estimate(key) <= self._sketch.estimate(victim):
+                    self.rejections += 1
+                    return
+                del self._entries[victim]
+            self._entries[key] = value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self.epoch += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejections": self.rejections,
+                "stale_puts": self.stale_puts
+            }
+
+
+translation_cache = TranslationCache()
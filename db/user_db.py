@@ -1,3 +1,7 @@
+USER_STATUS_ACTIVE = "active"
+USER_STATUS_BLOCKED = "blocked"
+
+
 class UserRepository:
     def __init__(self, cursor):
         self._cursor = cursor
@@ -11,13 +15,11 @@ class UserRepository:
         return self._cursor.fetchone() is not None
 
     def is_user_blocked(self, user_id):
-        self._cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
+        self._cursor.execute("SELECT status FROM users WHERE id = ?", (user_id,))
         result = self._cursor.fetchone()
         if not result:
             raise Exception("[*][is_user_blocked]Database error: user_id not found in users table")
-        password = result[0]
-        password_str = password.decode() if isinstance(password, bytes) else password
-        return password_str.startswith("!:")
+        return result[0] == USER_STATUS_BLOCKED
 
     def get_role_id_by_name(self, role_name):
         self._cursor.execute("SELECT id FROM roles WHERE role_name = ?", (role_name,))
@@ -28,11 +30,33 @@ class UserRepository:
 
     def get_all_users(self):
         self._cursor.execute("""
-            SELECT u.id, u.username, u.email, u.password, r.role_name
+            SELECT u.id, u.username, u.email, u.password, r.role_name, u.status
             FROM users u
             LEFT JOIN roles r ON u.role_id = r.id
         """)
+        return self._rows_to_users(self._cursor.fetchall())
+
+    def get_users_by_status(self, status):
+        self._cursor.execute("""
+            SELECT u.id, u.username, u.email, u.password, r.role_name, u.status
+            FROM users u
+            LEFT JOIN roles r ON u.role_id = r.id
+            WHERE u.status = ?
+        """, (status,))
+        return self._rows_to_users(self._cursor.fetchall())
+
+    def get_user_by_id(self, user_id):
+        self._cursor.execute("""
+            SELECT u.id, u.username, u.email, u.password, r.role_name, u.status
+            FROM users u
+            LEFT JOIN roles r ON u.role_id = r.id
+            WHERE u.id = ?
+        """, (user_id,))
         rows = self._cursor.fetchall()
+        return self._rows_to_users(rows).get(user_id)
+
+    @staticmethod
+    def _rows_to_users(rows):
         result = {}
         for row in rows:
             user_id = row[0]
@@ -40,7 +64,8 @@ class UserRepository:
                 "username": row[1],
                 "email": row[2],
                 "password": row[3],
-                "role": row[4]
+                "role": row[4],
+                "status": row[5]
             }
         return result
 
@@ -55,6 +80,22 @@ class UserRepository:
             raise Exception("[*][get_user_role]Database error: username not found in user_roles_view")
         return result[0]
 
+    def get_token_claims(self, usernames):
+        # username -> (role_name, token_generation)
+        usernames = list(dict.fromkeys(usernames))
+        result = {}
+        for start in range(0, len(usernames), 500):
+            chunk = usernames[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            self._cursor.execute(f"""
+                SELECT u.username, r.role_name, u.token_generation
+                FROM users u
+                JOIN roles r ON u.role_id = r.id
+                WHERE u.username IN ({placeholders})
+            """, chunk)
+            result.update((row[0], (row[1], row[2])) for row in self._cursor.fetchall())
+        return result
+
     def get_username_by_email(self, email):
         self._cursor.execute("SELECT username FROM users WHERE email = ?", (email,))
         result = self._cursor.fetchone()
@@ -63,11 +104,11 @@ class UserRepository:
         return result[0]
 
     def get_user_credentials(self, username):
-        self._cursor.execute("SELECT email, password FROM users WHERE username = ?", (username,))
+        self._cursor.execute("SELECT email, password, status FROM users WHERE username = ?", (username,))
         result = self._cursor.fetchone()
         if not result:
             raise Exception("[*][get_user_credentials]Database error: username not found in users table")
-        return {"email": result[0], "password": result[1]}
+        return {"email": result[0], "password": result[1], "status": result[2]}
 
     def get_user_id_by_username(self, username):
         self._cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
@@ -77,14 +118,8 @@ class UserRepository:
         return result[0]
 
     def db_get_all_blocked_users(self):
-        self._cursor.execute("SELECT id, username, password FROM users")
-        rows = self._cursor.fetchall()
-        result = {}
-        for user_id, username, password in rows:
-            password_str = password.decode() if isinstance(password, bytes) else password
-            if password_str.startswith("!:"):
-                result[user_id] = username
-        return result
+        self._cursor.execute("SELECT id, username FROM users WHERE status = ?", (USER_STATUS_BLOCKED,))
+        return dict(self._cursor.fetchall())
 
     def insert_user(self, username, email, password, role_name):
         role_id = self.get_role_id_by_name(role_name)
@@ -116,30 +151,29 @@ class UserRepository:
             WHERE id = ?
         """, values)
 
+    def get_password_hash_page(self, after_id, limit):
+        self._cursor.execute("SELECT id, password FROM users WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit))
+        return self._cursor.fetchall()
+
+    def update_password_hashes(self, updates):
+        # (new_password, user_id, old_password); rows changed since they were read are left alone
+        self._cursor.executemany("UPDATE users SET password = ? WHERE id = ? AND password = ?", updates)
+        return self._cursor.rowcount
+
     def db_block_user_by_id(self, user_id):
-        self._cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
-        result = self._cursor.fetchone()
-        if not result:
-            raise Exception("[*][block_user_by_id]Database error: user_id not found in users table")
-        current_password = result[0]
-        if isinstance(current_password, bytes):
-            if current_password.startswith(b"!:"):
-                raise Exception("[*][block_user_by_id]Database error: user is already blocked")
-            blocked_password = b"!:" + current_password
-        else:
-            if current_password.startswith("!:"):
-                raise Exception("[*][block_user_by_id]Database error: user is already blocked")
-            blocked_password = "!:" + current_password
-        self._cursor.execute("UPDATE users SET password = ? WHERE id = ?", (blocked_password, user_id))
+        self._cursor.execute("UPDATE users SET status = ? WHERE id = ? AND status = ?",
+                             (USER_STATUS_BLOCKED, user_id, USER_STATUS_ACTIVE))
+        if self._cursor.rowcount == 0:
+            self._cursor.execute("SELECT 1 FROM users WHERE id = ?", (user_id,))
+            if self._cursor.fetchone() is None:
+                raise Exception("[*][block_user_by_id]Database error: user_id not found in users table")
+            raise Exception("[*][block_user_by_id]Database error: user is already blocked")
 
     def db_unblock_user_by_id(self, user_id):
-        self._cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
-        result = self._cursor.fetchone()
-        if not result:
-            raise Exception("[*][unblock_user_by_id]Database error: user_id not found in users table")
-        password = result[0]
-        password_str = password.decode() if isinstance(password, bytes) else password
-        if not password_str.startswith("!:"):
+        self._cursor.execute("UPDATE users SET status = ? WHERE id = ? AND status = ?",
+                             (USER_STATUS_ACTIVE, user_id, USER_STATUS_BLOCKED))
+        if self._cursor.rowcount == 0:
+            self._cursor.execute("SELECT 1 FROM users WHERE id = ?", (user_id,))
+            if self._cursor.fetchone() is None:
+                raise Exception("[*][unblock_user_by_id]Database error: user_id not found in users table")
             raise Exception("[*][unblock_user_by_id]Database error: user is not blocked")
-        cleaned_password = password_str[2:].encode()
-        self._cursor.execute("UPDATE users SET password = ? WHERE id = ?", (cleaned_password, user_id))
@@ -1,13 +1,64 @@
+import json
+from contextlib import contextmanager
+from db.translation_cache import MISSING
+from db.connection import transaction
+from setting import WORD_PAGE_SIZE, EXPORT_FETCH_SIZE
+
+
 class WordRepository:
-    def __init__(self, cursor):
+    def __init__(self, cursor, cache=None):
         self._cursor = cursor
+        self._cache = cache
+        self._pending_invalidations = []
+
+    @contextmanager
+    def transaction(self):
+        # cached translations are dropped only once the write is visible to other connections
+        try:
+            with transaction(self._cursor):
+                yield self._cursor
+        finally:
+            self.flush_invalidations()
+
+    def flush_invalidations(self):
+        if self._cache is not None and self._pending_invalidations:
+            keys, self._pending_invalidations = self._pending_invalidations, []
+            self._cache.invalidate(*keys)
 
     def get_all_words_with_authors(self):
-        self._cursor.execute("""
-            SELECT d.id, d.english_word, d.persian_word, u.username
-            FROM dictionary_entries d
-            LEFT JOIN users u ON d.author_id = u.id
-        """)
+        return list(self.iter_words_with_authors())
+
+    def iter_words_with_authors(self, after_id=0, limit=None, author_username=None, page_size=WORD_PAGE_SIZE):
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = self.get_words_page(after_id, size, author_username)
+            yield from page
+            if len(page) < size:
+                return
+            after_id = page[-1]["id"]
+            if remaining is not None:
+                remaining -= len(page)
+
+    def get_words_page(self, after_id, limit, author_username=None):
+        if author_username is None:
+            self._cursor.execute("""
+                SELECT d.id, d.english_word, d.persian_word, u.username
+                FROM dictionary_entries d
+                LEFT JOIN users u ON d.author_id = u.id
+                WHERE d.id > ?
+                ORDER BY d.id
+                LIMIT ?
+            """, (after_id, limit))
+        else:
+            self._cursor.execute("""
+                SELECT d.id, d.english_word, d.persian_word, u.username
+                FROM dictionary_entries d
+                JOIN users u ON d.author_id = u.id
+                WHERE u.username = ? AND d.id > ?
+                ORDER BY d.id
+                LIMIT ?
+            """, (author_username, after_id, limit))
         rows = self._cursor.fetchall()
         return [
             {
@@ -19,11 +70,63 @@ class WordRepository:
             for row in rows
         ]
 
+    def get_distinct_english_words(self):
+        self._cursor.execute("SELECT english_word, COUNT(*) FROM dictionary_entries GROUP BY english_word")
+        return self._cursor.fetchall()
+
+    def get_distinct_persian_words(self):
+        self._cursor.execute("SELECT persian_word, COUNT(*) FROM dictionary_entries GROUP BY persian_word")
+        return self._cursor.fetchall()
+
+    def get_word_by_id(self, word_id):
+        self._cursor.execute("SELECT english_word, persian_word FROM dictionary_entries WHERE id = ?", (word_id,))
+        result = self._cursor.fetchone()
+        if not result:
+            return None
+        return {"english_word": result[0], "persian_word": result[1]}
+
+    def iter_export_rows(self, with_authors=True, author_username=None, min_id=None, max_id=None,
+                         batch_size=EXPORT_FETCH_SIZE):
+        columns = "d.id, d.english_word, d.persian_word" + (", u.username" if with_authors else "")
+        conditions = []
+        values = []
+        if author_username is not None:
+            conditions.append("d.author_id = (SELECT id FROM users WHERE username = ?)")
+            values.append(author_username)
+        if min_id is not None:
+            conditions.append("d.id >= ?")
+            values.append(min_id)
+        if max_id is not None:
+            conditions.append("d.id <= ?")
+            values.append(max_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._cursor.connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT {columns}
+                FROM dictionary_entries d
+                LEFT JOIN users u ON d.author_id = u.id
+                {where}
+                ORDER BY d.id
+            """, values)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
     def english_word_exists(self, en_word):
         self._cursor.execute("SELECT 1 FROM dictionary_entries WHERE english_word = ?", (en_word,))
         return self._cursor.fetchone() is not None
 
     def get_fa_translations_by_en_word(self, en_word):
+        if self._cache is not None:
+            cached = self._cache.get(("en", en_word))
+            if cached is not MISSING:
+                return dict(cached)
+            epoch = self._cache.epoch
         self._cursor.execute("""
             SELECT d.persian_word, u.username
             FROM dictionary_entries d
@@ -31,13 +134,21 @@ class WordRepository:
             WHERE d.english_word = ?
         """, (en_word,))
         rows = self._cursor.fetchall()
-        return {row[0]: row[1] for row in rows}
+        translations = {row[0]: row[1] for row in rows}
+        if self._cache is not None:
+            self._cache.put(("en", en_word), translations, epoch)
+        return dict(translations)
 
     def persian_word_exists(self, fa_word):
         self._cursor.execute("SELECT 1 FROM dictionary_entries WHERE persian_word = ?", (fa_word,))
         return self._cursor.fetchone() is not None
 
     def get_en_translations_by_fa_word(self, fa_word):
+        if self._cache is not None:
+            cached = self._cache.get(("fa", fa_word))
+            if cached is not MISSING:
+                return dict(cached)
+            epoch = self._cache.epoch
         self._cursor.execute("""
             SELECT d.english_word, u.username
             FROM dictionary_entries d
@@ -45,7 +156,67 @@ class WordRepository:
             WHERE d.persian_word = ?
         """, (fa_word,))
         rows = self._cursor.fetchall()
-        return {row[0]: row[1] for row in rows}
+        translations = {row[0]: row[1] for row in rows}
+        if self._cache is not None:
+            self._cache.put(("fa", fa_word), translations, epoch)
+        return dict(translations)
+
+    def get_translations_for_words(self, en_words, fa_words):
+        # resolves a whole batch in one uncached round trip, most phrase candidates never match anything.
+        # English compares lowercased, Persian through persian_key (fa_words normalized by logic.text);
+        # only words that were found are returned, keyed ("en", lowered word) / ("fa", normalized word)
+        en_words = list({word.lower() for word in en_words})
+        fa_words = list(set(fa_words))
+        if not en_words and not fa_words:
+            return {}
+        self._cursor.execute("""
+            SELECT 'en', lower(d.english_word), d.persian_word, u.username
+            FROM dictionary_entries d
+            LEFT JOIN users u ON d.author_id = u.id
+            WHERE lower(d.english_word) IN (SELECT value FROM json_each(?))
+            UNION ALL
+            SELECT 'fa', d.persian_key, d.english_word, u.username
+            FROM dictionary_entries d
+            LEFT JOIN users u ON d.author_id = u.id
+            WHERE d.persian_key IN (SELECT value FROM json_each(?))
+        """, (json.dumps(en_words), json.dumps(fa_words)))
+        translations = {}
+        for lang, word, translation, author in self._cursor.fetchall():
+            translations.setdefault((lang, word), {})[translation] = author
+        return translations
+
+    @staticmethod
+    def _build_match_query(text, prefix):
+        terms = []
+        for term in text.split():
+            term = term.replace('"', "")
+            if term:
+                terms.append(f'"{term}"*' if prefix else f'"{term}"')
+        return " ".join(terms)
+
+    def search_words(self, text, limit, prefix=True):
+        match_query = self._build_match_query(text, prefix)
+        if not match_query:
+            return []
+        self._cursor.execute("""
+            SELECT d.id, d.english_word, d.persian_word, u.username
+            FROM dictionary_fts f
+            JOIN dictionary_entries d ON d.id = f.rowid
+            LEFT JOIN users u ON d.author_id = u.id
+            WHERE dictionary_fts MATCH ?
+            ORDER BY f.rank
+            LIMIT ?
+        """, (match_query, limit))
+        rows = self._cursor.fetchall()
+        return [
+            {
+                "id": row[0],
+                "english_word": row[1],
+                "persian_word": row[2],
+                "author": row[3]
+            }
+            for row in rows
+        ]
 
     def insert_word(self, en_word, fa_word, author_username):
         self._cursor.execute("SELECT id FROM users WHERE username = ?", (author_username,))
@@ -57,6 +228,22 @@ class WordRepository:
             INSERT INTO dictionary_entries (english_word, persian_word, author_id)
             VALUES (?, ?, ?)
         """, (en_word, fa_word, author_id))
+        self._invalidate(en_word, fa_word)
+
+    def insert_words(self, rows, author_id):
+        # -> the (english_word, persian_word) pairs that were new; one execute per row, since
+        # executemany only reports a total and the caller needs to know which rows were skipped
+        inserted = []
+        for en_word, fa_word in rows:
+            self._cursor.execute("""
+                INSERT INTO dictionary_entries (english_word, persian_word, author_id)
+                VALUES (?, ?, ?)
+                ON CONFLICT (english_word, persian_word) DO NOTHING
+            """, (en_word, fa_word, author_id))
+            if self._cursor.rowcount:
+                inserted.append((en_word, fa_word))
+                self._invalidate(en_word, fa_word)
+        return inserted
 
     def author_has_words(self, author_username):
         self._cursor.execute("""
@@ -76,9 +263,17 @@ class WordRepository:
         """, (word_id, author_username))
         return self._cursor.fetchone() is not None
 
+    def _invalidate(self, en_word, fa_word):
+        # call flush_invalidations() after the commit, or write inside self.transaction()
+        if self._cache is not None:
+            self._pending_invalidations.extend((("en", en_word), ("fa", fa_word)))
+
     def update_word_by_id(self, word_id, fields):
         if not fields:
-            return
+            return None
+        old_word = self.get_word_by_id(word_id)
+        if old_word:
+            self._invalidate(old_word["english_word"], old_word["persian_word"])
         updates = []
         values = []
         if "english_word" in fields:
@@ -93,10 +288,16 @@ class WordRepository:
             SET {', '.join(updates)}
             WHERE id = ?
         """, values)
+        self._invalidate(fields.get("english_word"), fields.get("persian_word"))
+        return old_word
 
     def word_id_exists(self, word_id):
         self._cursor.execute("SELECT 1 FROM dictionary_entries WHERE id = ?", (word_id,))
         return self._cursor.fetchone() is not None
 
     def delete_word_by_id(self, word_id):
+        old_word = self.get_word_by_id(word_id)
+        if old_word:
+            self._invalidate(old_word["english_word"], old_word["persian_word"])
         self._cursor.execute("DELETE FROM dictionary_entries WHERE id = ?", (word_id,))
+        return old_word
@@ -1,38 +1,105 @@
-import bcrypt, json, time
-from setting import MAX_WORD_LENGTH, BCRYPT_SALT_ROUNDS, PUBLIC_KEY_PATH
-from cryptography.hazmat.primitives import serialization
+import json, time, functools
+from dataclasses import dataclass, field
+from setting import (MAX_WORD_LENGTH, SEARCH_RESULT_LIMIT, SUGGESTION_LIMIT, WORD_PAGE_SIZE, TRANSLATE_MAX_TOKENS,
+                     TRANSLATE_MAX_PHRASE_WORDS)
 from cryptography.exceptions import InvalidSignature
 from db.word_db import WordRepository
-from db.user_db import UserRepository
+from db.translation_cache import translation_cache
+from db.connection import transaction
+from db.instrumentation import query_stats
+from db.user_db import UserRepository, USER_STATUS_ACTIVE, USER_STATUS_BLOCKED
 from db.role import RoleRepository
+from logic.keys import public_key_ring, DEFAULT_KEY_ID
+from logic.token_cache import VerifiedTokenCache
+from logic.token_format import COMPACT_TOKEN_PREFIX, parse_compact_token
+from logic.revocation import revocations, get_revocation_list
+from logic.suggest import get_suggestions
+from logic.hashing import password_hasher
+from logic.profiling import profiler
+from logic.text import tokenize_text, phrase_candidates, is_persian
+
+verified_tokens = VerifiedTokenCache()
+public_key_ring.subscribe(verified_tokens.clear)
+
+
+@dataclass(frozen=True, slots=True)
+class AuthContext:
+    subject: str
+    role: str
+    exp: int
+    generation: int = 0
+    # the verified token this context was decoded from; AccessControl re-derives the claims from it
+    token: str = field(default="", repr=False)
+
+    def is_expired(self):
+        return int(time.time()) > self.exp
 
 
 class TokenValidator:
+    signature_checks = 0
+
     @staticmethod
-    def is_token_valid(token: str) -> bool:
-        if not isinstance(token, str) or not token.strip():
-            return False
-        try:
-            payload_json, signature_hex = token.rsplit(".", 1)
-            signature_bytes = bytes.fromhex(signature_hex)
-            with open(PUBLIC_KEY_PATH, "rb") as f:
-                public_key = serialization.load_pem_public_key(f.read())
-            public_key.verify(signature_bytes, payload_json.encode("utf-8"))
-            payload = json.loads(payload_json)
-            exp = payload.get("exp")
-            return isinstance(exp, int) and int(time.time()) <= exp
-        except (ValueError, InvalidSignature, json.JSONDecodeError, FileNotFoundError):
-            return False
+    def _verify(token, revocation_list=None):
+        # revocation_list belongs to the database the caller works on, the default one when omitted
+        if revocation_list is None:
+            revocation_list = revocations
+        entry = TokenValidator._verify_signature(token)
+        if entry is None or revocation_list.is_revoked(entry[0]):
+            return None
+        return entry
+
+    @staticmethod
+    def _parse(token):
+        # -> (payload, signed bytes, signature); both formats are accepted while v1 tokens are still out there
+        if token.startswith(COMPACT_TOKEN_PREFIX):
+            return parse_compact_token(token)
+        payload_json, signature_hex = token.rsplit(".", 1)
+        return json.loads(payload_json), payload_json.encode("utf-8"), bytes.fromhex(signature_hex)
 
     @staticmethod
-    def extract_payload(token: str):
-        if not TokenValidator.is_token_valid(token):
+    def _verify_signature(token):
+        if not isinstance(token, str) or not token.strip():
             return None
+        public_key_ring.refresh_if_due()
+        entry = verified_tokens.get(token)
+        if entry is not None:
+            return entry
         try:
-            payload_json = token.rsplit(".", 1)[0]
-            return json.loads(payload_json)
-        except (ValueError, json.JSONDecodeError):
+            payload, signed, signature = TokenValidator._parse(token)
+            if not isinstance(payload, dict):
+                return None
+            public_key = public_key_ring.get_key(payload.get("kid", DEFAULT_KEY_ID))
+            if public_key is None:
+                return None
+            TokenValidator.signature_checks += 1
+            public_key.verify(signature, signed)
+        except (ValueError, TypeError, InvalidSignature, json.JSONDecodeError):
+            return None
+        exp = payload.get("exp")
+        if not isinstance(exp, int) or int(time.time()) > exp:
+            return None
+        sub, role, generation = payload.get("sub"), payload.get("role"), payload.get("gen", 0)
+        if not isinstance(sub, str) or not isinstance(role, str) or not isinstance(generation, int):
+            return None
+        entry = (AuthContext(sub, role, exp, generation, token), payload)
+        verified_tokens.put(token, entry, exp)
+        return entry
+
+    @staticmethod
+    def decode(token: str, revocation_list=None):
+        entry = TokenValidator._verify(token, revocation_list)
+        return entry[0] if entry is not None else None
+
+    @staticmethod
+    def is_token_valid(token: str, revocation_list=None) -> bool:
+        return TokenValidator._verify(token, revocation_list) is not None
+
+    @staticmethod
+    def extract_payload(token: str, revocation_list=None):
+        entry = TokenValidator._verify(token, revocation_list)
+        if entry is None:
             return None
+        return dict(entry[1])
 
 
 class AccessControl:
@@ -40,244 +107,390 @@ class AccessControl:
         self.allowed_roles = allowed_roles
 
     def __call__(self, func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            auth = kwargs.pop("auth", None)
             token = kwargs.pop("token", "")
-            if not token or not TokenValidator.is_token_valid(token):
-                return ""
-            payload = TokenValidator.extract_payload(token)
-            if not payload or payload.get("role") not in self.allowed_roles:
+            if auth is not None:
+                # only the token of a passed context is used; a hit in the verified-token cache
+                # makes decoding it again cheap, and a hand-built context carries no token
+                token = auth.token
+            # checked against the revocations of the database this action instance works on
+            auth = TokenValidator.decode(token, args[0].revocations) if token else None
+            if auth is None or auth.is_expired() or auth.role not in self.allowed_roles:
                 return ""
+            if query_stats.enabled or profiler.enabled:
+                with query_stats.action(func.__qualname__), profiler.profile(func.__qualname__):
+                    return func(*args, **kwargs)
             return func(*args, **kwargs)
+        wrapper.allowed_roles = self.allowed_roles
         return wrapper
 
 
 class DictionaryActions:
-    def __init__(self, cursor):
+    def __init__(self, cursor, output=print):
         self.cursor = cursor
-        self.word_repo = WordRepository(cursor)
+        self.output = output
+        self.revocations = get_revocation_list(cursor)
+        self.suggestions = get_suggestions(cursor)
+        self.word_repo = WordRepository(cursor, cache=translation_cache)
+
+    def _print_suggestions(self, matches):
+        if matches:
+            self.output(f"Did you mean: {', '.join(matches)}?")
 
     @AccessControl(("normal_user", "power_user", "admin"))
     def show_fa_translations(self, en_word):
-        if not self.word_repo.english_word_exists(en_word):
-            print("Word not found in dictionary.")
-            return
         translations = self.word_repo.get_fa_translations_by_en_word(en_word)
+        if not translations:
+            self.output("Word not found in dictionary.")
+            self._print_suggestions(self.suggestions.suggest_english(en_word, SUGGESTION_LIMIT))
+            return
         for fa_word, author in translations.items():
-            print(f"{fa_word} => {author}")
+            self.output(f"{fa_word} => {author}")
+        return translations
 
     @AccessControl(("normal_user", "power_user", "admin"))
     def show_en_translations(self, fa_word):
-        if not self.word_repo.persian_word_exists(fa_word):
-            print("Word not found in dictionary.")
-            return
         translations = self.word_repo.get_en_translations_by_fa_word(fa_word)
+        if not translations:
+            self.output("Word not found in dictionary.")
+            self._print_suggestions(self.suggestions.suggest_persian(fa_word, SUGGESTION_LIMIT))
+            return
         for en_word, author in translations.items():
-            print(f"{en_word} => {author}")
+            self.output(f"{en_word} => {author}")
+        return translations
+
+    def _translate_tokens(self, tokens, max_words):
+        if not tokens:
+            self.output("Nothing to translate.")
+            return
+        if len(tokens) > TRANSLATE_MAX_TOKENS:
+            self.output(f"At most {TRANSLATE_MAX_TOKENS} words can be translated at once.")
+            return
+        en_words, fa_words = set(), set()
+        for phrase in phrase_candidates(tokens, max_words):
+            if is_persian(phrase):
+                fa_words.add(phrase)
+            else:
+                en_words.add(phrase.lower())
+        found = self.word_repo.get_translations_for_words(en_words, fa_words)
+
+        def lookup(phrase):
+            if is_persian(phrase):
+                return "fa", found.get(("fa", phrase))
+            return "en", found.get(("en", phrase.lower()))
+
+        results = []
+        start = 0
+        while start < len(tokens):
+            # longest phrase first, so multi-word entries win over their single words
+            for size in range(min(max_words, len(tokens) - start), 0, -1):
+                phrase = " ".join(tokens[start:start + size])
+                language, translations = lookup(phrase)
+                if translations or size == 1:
+                    break
+            results.append({"token": phrase, "language": language, "translations": translations or {}})
+            start += size
+        for result in results:
+            translated = ", ".join(f"{word} ({author})" for word, author in result["translations"].items())
+            self.output(f"{result['token']} => {translated or '?'}")
+        return results
+
+    @AccessControl(("normal_user", "power_user", "admin"))
+    def translate_text(self, text):
+        return self._translate_tokens(tokenize_text(text), TRANSLATE_MAX_PHRASE_WORDS)
+
+    @AccessControl(("normal_user", "power_user", "admin"))
+    def translate_words(self, words):
+        tokens = [" ".join(tokenize_text(word)) for word in words]
+        return self._translate_tokens([token for token in tokens if token], 1)
+
+    @AccessControl(("normal_user", "power_user", "admin"))
+    def search(self, text, limit=SEARCH_RESULT_LIMIT, prefix=True):
+        results = self.word_repo.search_words(text, limit, prefix)
+        if not results:
+            self.output("No matching words found.")
+            return
+        self.output(self._format_entries(results))
+        return results
+
+    @staticmethod
+    def _format_entries(entries):
+        return "\n".join(
+            f"{entry['id']}) {entry['english_word']} = {entry['persian_word']} => {entry['author']}"
+            for entry in entries
+        )
+
+    @AccessControl(("normal_user", "power_user", "admin"))
+    def list_words(self, after_id=0, limit=WORD_PAGE_SIZE, author_username=None):
+        return self.word_repo.get_words_page(after_id, limit, author_username)
 
     @AccessControl(("normal_user", "power_user", "admin"))
     def print_all_dictionary_words(self):
-        words = self.word_repo.get_all_words_with_authors()
-        if not words:
-            print("Dictionary is empty.")
+        empty = True
+        after_id = 0
+        while True:
+            page = self.word_repo.get_words_page(after_id, WORD_PAGE_SIZE)
+            if not page:
+                break
+            empty = False
+            self.output(self._format_entries(page))
+            after_id = page[-1]["id"]
+        if empty:
+            self.output("Dictionary is empty.")
             return
-        for entry in words:
-            print(f"{entry['id']}) {entry['english_word']} = {entry['persian_word']} => {entry['author']}")
+        return True
+
+    @AccessControl(("normal_user", "power_user", "admin"))
+    def print_dictionary_page(self, after_id=0, limit=WORD_PAGE_SIZE, author_username=None):
+        page = self.word_repo.get_words_page(after_id, limit + 1, author_username)
+        if not page:
+            if after_id == 0:
+                if author_username is None:
+                    self.output("Dictionary is empty.")
+                else:
+                    self.output("You haven't submitted any words yet.")
+            return None
+        has_more = len(page) > limit
+        page = page[:limit]
+        self.output(self._format_entries(page))
+        return page[-1]["id"] if has_more else None
 
     @AccessControl(("power_user", "admin"))
     def add_new_word(self, en_word, fa_word, author_username):
         if len(en_word) > MAX_WORD_LENGTH or len(fa_word) > MAX_WORD_LENGTH:
-            print(f"Each word must be at most {MAX_WORD_LENGTH} characters.")
+            self.output(f"Each word must be at most {MAX_WORD_LENGTH} characters.")
             return
-        self.word_repo.insert_word(en_word, fa_word, author_username)
-        self.cursor.connection.commit()
-        print("Word added successfully.")
+        with self.word_repo.transaction():
+            self.word_repo.insert_word(en_word, fa_word, author_username)
+        self.suggestions.word_added(en_word, fa_word)
+        self.output("Word added successfully.")
+        return True
 
     @AccessControl(("power_user",))
     def edit_own_word(self, word_id, new_en, new_fa, author_username):
         if not self.word_repo.author_has_words(author_username):
-            print("You haven't submitted any words yet.")
+            self.output("You haven't submitted any words yet.")
             return
         if not self.word_repo.word_id_belongs_to_author(word_id, author_username):
-            print("You are not allowed to edit this word.")
+            self.output("You are not allowed to edit this word.")
             return
         if len(new_en) > MAX_WORD_LENGTH or len(new_fa) > MAX_WORD_LENGTH:
-            print(f"Each word must be at most {MAX_WORD_LENGTH} characters.")
+            self.output(f"Each word must be at most {MAX_WORD_LENGTH} characters.")
+            return
+        with self.word_repo.transaction():
+            old_word = self.word_repo.update_word_by_id(word_id, {"english_word": new_en, "persian_word": new_fa})
+        if old_word is None:
+            self.output("Word ID not found.")
             return
-        self.word_repo.update_word_by_id(word_id, {"english_word": new_en, "persian_word": new_fa})
-        self.cursor.connection.commit()
-        print("Word updated successfully.")
+        self.suggestions.word_removed(old_word["english_word"], old_word["persian_word"])
+        self.suggestions.word_added(new_en, new_fa)
+        self.output("Word updated successfully.")
+        return True
 
     @AccessControl(("admin",))
     def edit_any_word(self, word_id, new_en, new_fa):
         if not self.word_repo.word_id_exists(word_id):
-            print("Word ID not found.")
+            self.output("Word ID not found.")
             return
         if len(new_en) > MAX_WORD_LENGTH or len(new_fa) > MAX_WORD_LENGTH:
-            print(f"Each word must be at most {MAX_WORD_LENGTH} characters.")
+            self.output(f"Each word must be at most {MAX_WORD_LENGTH} characters.")
             return
-        self.word_repo.update_word_by_id(word_id, {"english_word": new_en, "persian_word": new_fa})
-        self.cursor.connection.commit()
-        print("Word updated successfully.")
+        with self.word_repo.transaction():
+            old_word = self.word_repo.update_word_by_id(word_id, {"english_word": new_en, "persian_word": new_fa})
+        if old_word is None:
+            self.output("Word ID not found.")
+            return
+        self.suggestions.word_removed(old_word["english_word"], old_word["persian_word"])
+        self.suggestions.word_added(new_en, new_fa)
+        self.output("Word updated successfully.")
+        return True
 
     @AccessControl(("power_user",))
     def delete_own_word(self, word_id, author_username):
         if not self.word_repo.author_has_words(author_username):
-            print("You haven't submitted any words yet.")
+            self.output("You haven't submitted any words yet.")
             return
         if not self.word_repo.word_id_belongs_to_author(word_id, author_username):
-            print("You are not allowed to delete this word.")
+            self.output("You are not allowed to delete this word.")
+            return
+        with self.word_repo.transaction():
+            old_word = self.word_repo.delete_word_by_id(word_id)
+        if old_word is None:
+            self.output("Word ID not found.")
             return
-        self.word_repo.delete_word_by_id(word_id)
-        self.cursor.connection.commit()
-        print("Word deleted successfully.")
+        self.suggestions.word_removed(old_word["english_word"], old_word["persian_word"])
+        self.output("Word deleted successfully.")
+        return True
 
     @AccessControl(("admin",))
     def delete_any_word(self, word_id):
         if not self.word_repo.word_id_exists(word_id):
-            print("Word ID not found.")
+            self.output("Word ID not found.")
+            return
+        with self.word_repo.transaction():
+            old_word = self.word_repo.delete_word_by_id(word_id)
+        if old_word is None:
+            self.output("Word ID not found.")
             return
-        self.word_repo.delete_word_by_id(word_id)
-        self.cursor.connection.commit()
-        print("Word deleted successfully.")
+        self.suggestions.word_removed(old_word["english_word"], old_word["persian_word"])
+        self.output("Word deleted successfully.")
+        return True
 
 
 class UserActions:
-    def __init__(self, cursor):
+    def __init__(self, cursor, output=print):
         self.cursor = cursor
+        self.output = output
+        self.revocations = get_revocation_list(cursor)
         self.user_repo = UserRepository(cursor)
         self.role_repo = RoleRepository(cursor)
 
     @AccessControl(("admin",))
     def show_all_users(self, current_username):
         users = self.user_repo.get_all_users()
+        shown = {}
         for user_id, data in users.items():
             if data["username"] == current_username:
                 continue
-            print(f"{user_id}) {data['username']} | {data['email']} | {data['role']}")
+            self.output(f"{user_id}) {data['username']} | {data['email']} | {data['role']}")
+            shown[user_id] = data
+        return shown
 
     @AccessControl(("admin",))
     def create_new_user(self, new_username, new_email, new_password, role_id,
                         current_admin_username, confirm_admin_downgrade=False):
         if self.user_repo.user_exists(new_username):
-            print("Username already exists.")
+            self.output("Username already exists.")
             return
         if self.user_repo.email_exists(new_email):
-            print("Email already exists.")
+            self.output("Email already exists.")
             return
-        hashed_password = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt(BCRYPT_SALT_ROUNDS)).decode()
+        hashed_password = password_hasher.make_password_hash(new_password)
         if not self.role_repo.role_id_exists(role_id):
-            print("Role ID not found.")
+            self.output("Role ID not found.")
             return
         selected_role_name = self.role_repo.get_role_name_by_id(role_id)
         if selected_role_name == "admin":
             if not confirm_admin_downgrade:
-                print("Operation cancelled. Admin downgrade not confirmed.")
+                self.output("Operation cancelled. Admin downgrade not confirmed.")
                 return
-            self.user_repo.insert_user(new_username, new_email, hashed_password, "admin")
-            self.cursor.connection.commit()
-            current_admin_id = self.user_repo.get_user_id_by_username(current_admin_username)
-            self.user_repo.update_user_by_id(current_admin_id, {"role_name": "power_user"})
-            self.cursor.connection.commit()
-            print("User created as admin. Your role has been downgraded to power_user.")
-            return
-        self.user_repo.insert_user(new_username, new_email, hashed_password, selected_role_name)
-        self.cursor.connection.commit()
-        print(f"User created successfully with role '{selected_role_name}'.")
+            with transaction(self.cursor):
+                self.user_repo.insert_user(new_username, new_email, hashed_password, "admin")
+                current_admin_id = self.user_repo.get_user_id_by_username(current_admin_username)
+                self.user_repo.update_user_by_id(current_admin_id, {"role_name": "power_user"})
+            self.revocations.invalidate()
+            self.output("User created as admin. Your role has been downgraded to power_user.")
+            return True
+        with transaction(self.cursor):
+            self.user_repo.insert_user(new_username, new_email, hashed_password, selected_role_name)
+        self.output(f"User created successfully with role '{selected_role_name}'.")
+        return True
 
     @AccessControl(("admin",))
     def change_user_role(self, target_user_id, new_role_id, current_admin_username, confirm_admin_downgrade=False):
         users = self.user_repo.get_all_users()
         if target_user_id not in users or users[target_user_id]["username"] == current_admin_username:
-            print("Invalid user ID.")
+            self.output("Invalid user ID.")
             return
         if not self.role_repo.role_id_exists(new_role_id):
-            print("Role ID not found.")
+            self.output("Role ID not found.")
             return
         selected_role_name = self.role_repo.get_role_name_by_id(new_role_id)
         if selected_role_name == "admin":
             if not confirm_admin_downgrade:
-                print("Operation cancelled.")
+                self.output("Operation cancelled.")
                 return
-            self.user_repo.update_user_by_id(target_user_id, {"role_name": "admin"})
-            self.cursor.connection.commit()
-            current_admin_id = self.user_repo.get_user_id_by_username(current_admin_username)
-            self.user_repo.update_user_by_id(current_admin_id, {"role_name": "power_user"})
-            self.cursor.connection.commit()
-            print("Role updated. You are now a power_user.")
-            return
-        self.user_repo.update_user_by_id(target_user_id, {"role_name": selected_role_name})
-        self.cursor.connection.commit()
-        print(f"Role updated successfully to '{selected_role_name}'.")
+            with transaction(self.cursor):
+                self.user_repo.update_user_by_id(target_user_id, {"role_name": "admin"})
+                current_admin_id = self.user_repo.get_user_id_by_username(current_admin_username)
+                self.user_repo.update_user_by_id(current_admin_id, {"role_name": "power_user"})
+            self.revocations.invalidate()
+            self.output("Role updated. You are now a power_user.")
+            return True
+        with transaction(self.cursor):
+            self.user_repo.update_user_by_id(target_user_id, {"role_name": selected_role_name})
+        self.revocations.invalidate()
+        self.output(f"Role updated successfully to '{selected_role_name}'.")
+        return True
 
 
 class BlockActions:
-    def __init__(self, cursor):
+    def __init__(self, cursor, output=print):
         self.cursor = cursor
+        self.output = output
+        self.revocations = get_revocation_list(cursor)
         self.user_repo = UserRepository(cursor)
 
     @AccessControl(("admin",))
     def show_blocked_users(self):
         blocked_users = self.user_repo.db_get_all_blocked_users()
         if not blocked_users:
-            print("No blocked users found.")
+            self.output("No blocked users found.")
             return
         for user_id, username in blocked_users.items():
-            print(f"{user_id}) {username}")
+            self.output(f"{user_id}) {username}")
+        return blocked_users
 
     @AccessControl(("admin",))
     def show_unblocked_users(self, current_admin_username):
-        users = self.user_repo.get_all_users()
-        found = False
+        users = self.user_repo.get_users_by_status(USER_STATUS_ACTIVE)
+        shown = {}
         for user_id, data in users.items():
             if data["username"] == current_admin_username:
                 continue
-            if not self.user_repo.is_user_blocked(user_id):
-                print(f"{user_id}) {data['username']} | {data['email']} | {data['role']}")
-                found = True
-        if not found:
-            print("No users available to block.")
+            self.output(f"{user_id}) {data['username']} | {data['email']} | {data['role']}")
+            shown[user_id] = data
+        if not shown:
+            self.output("No users available to block.")
+        return shown
 
     @AccessControl(("admin",))
     def show_users_to_unblock(self, current_admin_username):
-        users = self.user_repo.get_all_users()
-        found = False
+        users = self.user_repo.get_users_by_status(USER_STATUS_BLOCKED)
+        shown = {}
         for user_id, data in users.items():
             if data["username"] == current_admin_username:
                 continue
-            if self.user_repo.is_user_blocked(user_id):
-                print(f"{user_id}) {data['username']} | {data['email']} | {data['role']}")
-                found = True
-        if not found:
-            print("No blocked users found.")
+            self.output(f"{user_id}) {data['username']} | {data['email']} | {data['role']}")
+            shown[user_id] = data
+        if not shown:
+            self.output("No blocked users found.")
+        return shown
 
     @AccessControl(("admin",))
     def block_user_by_id(self, target_user_id, current_admin_username):
-        users = self.user_repo.get_all_users()
-        if target_user_id not in users:
-            print("Invalid user ID.")
+        user = self.user_repo.get_user_by_id(target_user_id)
+        if user is None:
+            self.output("Invalid user ID.")
             return
-        if users[target_user_id]["username"] == current_admin_username:
-            print("You cannot block yourself.")
+        if user["username"] == current_admin_username:
+            self.output("You cannot block yourself.")
             return
-        if self.user_repo.is_user_blocked(target_user_id):
-            print("User is already blocked.")
+        if user["status"] == USER_STATUS_BLOCKED:
+            self.output("User is already blocked.")
             return
-        self.user_repo.db_block_user_by_id(target_user_id)
-        self.cursor.connection.commit()
-        print("User blocked successfully.")
+        with transaction(self.cursor):
+            self.user_repo.db_block_user_by_id(target_user_id)
+        self.revocations.invalidate()
+        self.output("User blocked successfully.")
+        return True
 
     @AccessControl(("admin",))
     def unblock_user_by_id(self, target_user_id, current_admin_username):
-        users = self.user_repo.get_all_users()
-        if target_user_id not in users:
-            print("Invalid user ID.")
+        user = self.user_repo.get_user_by_id(target_user_id)
+        if user is None:
+            self.output("Invalid user ID.")
             return
-        if users[target_user_id]["username"] == current_admin_username:
-            print("You cannot unblock yourself.")
+        if user["username"] == current_admin_username:
+            self.output("You cannot unblock yourself.")
             return
-        if not self.user_repo.is_user_blocked(target_user_id):
-            print("User is not blocked.")
+        if user["status"] != USER_STATUS_BLOCKED:
+            self.output("User is not blocked.")
             return
-        self.user_repo.db_unblock_user_by_id(target_user_id)
-        self.cursor.connection.commit()
-        print("User unblocked successfully.")
+        with transaction(self.cursor):
+            self.user_repo.db_unblock_user_by_id(target_user_id)
+        self.revocations.invalidate()
+        self.output("User unblocked successfully.")
+        return True
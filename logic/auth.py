@@ -1,9 +1,16 @@
-import json, bcrypt, time, smtplib, random, base64, binascii
-from email.mime.text import MIMEText
-from cryptography.hazmat.primitives import serialization
-from setting import PRIVATE_KEY_PATH, PRIVATE_KEY_PASSWORD, TOKEN_EXPIRATION, BCRYPT_SALT_ROUNDS, SENDER_EMAIL, \
-    APP_PASSWORD
-from db.user_db import UserRepository
+import json, time
+from setting import TOKEN_EXPIRATION, TOKEN_FORMAT, RESET_CODE_TTL
+from db.user_db import UserRepository, USER_STATUS_BLOCKED
+from db.connection import transaction
+from logic.keys import signer, DEFAULT_KEY_ID
+from logic.token_format import TOKEN_FORMATS, TOKEN_ISSUER, encode_compact_token
+from logic.hashing import password_hasher
+from logic.mailer import queue_email
+from logic.reset_codes import generate_reset_code, get_reset_code_store
+from logic.rate_limit import auth_rate_limits
+
+if TOKEN_FORMAT not in TOKEN_FORMATS:
+    raise Exception(f"[*][auth]Config error: unknown TOKEN_FORMAT '{TOKEN_FORMAT}'")
 
 
 class TokenService:
@@ -12,26 +19,43 @@ class TokenService:
 
     @staticmethod
     def sign_payload(payload_json):
-        with open(PRIVATE_KEY_PATH, "rb") as f:
-            password_bytes = PRIVATE_KEY_PASSWORD.encode("utf-8")
-            private_key = serialization.load_pem_private_key(f.read(), password=password_bytes)
-        signature = private_key.sign(payload_json.encode("utf-8"))
+        signature = signer.sign(payload_json.encode("utf-8"))
         return signature.hex()
 
-    def build_token(self, username):
-        role = self._user_repo.get_user_role(username)
-        now = int(time.time())
+    @staticmethod
+    def _encode_token(username, role, generation, now, token_format=TOKEN_FORMAT):
+        kid = signer.kid if signer.kid != DEFAULT_KEY_ID else ""
+        if token_format == "v2":
+            return encode_compact_token(signer.sign, username, role, now, now + TOKEN_EXPIRATION, generation, kid)
+        if token_format != "v1":
+            raise ValueError(f"[*][_encode_token]Config error: unknown TOKEN_FORMAT '{token_format}'")
         payload = {
             "sub": username,
             "role": role,
+            "gen": generation,
             "iat": now,
             "exp": now + TOKEN_EXPIRATION,
-            "iss": "auth"
+            "iss": TOKEN_ISSUER
         }
+        if kid:
+            payload["kid"] = kid
         payload_json = json.dumps(payload, separators=(",", ":"))
-        signature_hex = self.sign_payload(payload_json)
+        signature_hex = TokenService.sign_payload(payload_json)
         return payload_json + "." + signature_hex
 
+    def build_token(self, username):
+        claims = self._user_repo.get_token_claims([username])
+        if username not in claims:
+            raise Exception("[*][build_token]Database error: username not found in users table")
+        role, generation = claims[username]
+        return self._encode_token(username, role, generation, int(time.time()))
+
+    def build_tokens(self, usernames):
+        claims = self._user_repo.get_token_claims(usernames)
+        now = int(time.time())
+        return {username: self._encode_token(username, role, generation, now)
+                for username, (role, generation) in claims.items()}
+
 
 class AuthService:
     def __init__(self, user_repo: UserRepository, token_service: TokenService, cursor):
@@ -39,27 +63,36 @@ class AuthService:
         self._token_service = token_service
         self._cursor = cursor
 
-    def login_user(self, username, password):
+    def login_user(self, username, password, client=None):
+        # throttled before any query or bcrypt work, unknown usernames included
+        auth_rate_limits.check_login(username, client)
         if not self._user_repo.user_exists(username):
             return ""
         creds = self._user_repo.get_user_credentials(username)
-        stored_str = creds["password"]
-        stored_bytes = safe_decode_password(stored_str)
-        if not bcrypt.checkpw(password.encode(), stored_bytes):
+        if creds["status"] == USER_STATUS_BLOCKED:
             return ""
+        matches, needs_rehash = password_hasher.verify_password(password, creds["password"])
+        if not matches:
+            return ""
+        if needs_rehash:
+            user_id = self._user_repo.get_user_id_by_username(username)
+            hashed_str = password_hasher.make_password_hash(password)
+            with transaction(self._cursor):
+                self._user_repo.update_user_by_id(user_id, {"password": hashed_str})
+        auth_rate_limits.login_succeeded(username)
         return self._token_service.build_token(username)
 
-    def sign_in_user(self, username, email, password):
+    def sign_in_user(self, username, email, password, client=None):
+        auth_rate_limits.check_sign_up(client)
         if "@" not in email or "." not in email or email.index("@") > email.rindex("."):
             return ""
         if self._user_repo.user_exists(username):
             return ""
         if self._user_repo.email_exists(email):
             return ""
-        hashed_bytes = bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_SALT_ROUNDS))
-        hashed_str = base64.b64encode(hashed_bytes).decode("utf-8")  # ذخیره به صورت TEXT
-        self._user_repo.insert_user(username, email, hashed_str, role_name="normal_user")
-        self._cursor.connection.commit()
+        hashed_str = password_hasher.make_password_hash(password)
+        with transaction(self._cursor):
+            self._user_repo.insert_user(username, email, hashed_str, role_name="normal_user")
         return self._token_service.build_token(username)
 
 
@@ -68,55 +101,39 @@ class PasswordResetService:
         self._user_repo = user_repo
         self._token_service = token_service
         self._cursor = cursor
+        self._codes = get_reset_code_store(cursor)
 
-    @staticmethod
-    def generate_reset_code():
-        return str(random.randrange(1000, 10000))
+    def send_recovery_email(self, username, email, code):
+        # queued in the outbox; the body is wiped once sent, or once the code expires if it never is
+        body = f"Hi {username}!\n\nYour recovery code is: {code}\n\nIf you didn’t request this, just ignore it."
+        queue_email(self._cursor, email, "Password Reset Code", body, expires_at=time.time() + RESET_CODE_TTL)
 
-    @staticmethod
-    def send_recovery_email(username, email, code):
-        message = MIMEText(
-            f"Hi {username}!\n\nYour recovery code is: {code}\n\nIf you didn’t request this, just ignore it.")
-        message["Subject"] = "Password Reset Code"
-        message["From"] = SENDER_EMAIL
-        message["To"] = email
-        server = smtplib.SMTP_SSL("smtp.gmail.com", 465)
-        server.login(SENDER_EMAIL, APP_PASSWORD)
-        server.send_message(message)
-        server.quit()
-
-    def initiate_password_reset(self, email):
+    def initiate_password_reset(self, email, client=None):
+        auth_rate_limits.check_password_reset(email, client)
         if not self._user_repo.email_exists(email):
             return ""
         username = self._user_repo.get_username_by_email(email)
         creds = self._user_repo.get_user_credentials(username)
-        stored_str = creds["password"]
-        if isinstance(stored_str, str) and stored_str.startswith("!:"):
+        if creds["status"] == USER_STATUS_BLOCKED:
             return ""
-        code = self.generate_reset_code()
+        code = generate_reset_code()
+        self._codes.issue(email, code)
         self.send_recovery_email(username, email, code)
-        return code
+        return True
 
-    @staticmethod
-    def verify_reset_code(code, user_code):
-        if not code:
+    def verify_reset_code(self, email, user_code):
+        if not email or not user_code:
             return False
-        return user_code == code
+        return self._codes.verify(email, user_code)
 
     def complete_password_reset(self, email, new_password):
+        # only after verify_reset_code succeeded for this email, and only once
+        if not self._codes.consume(email):
+            return ""
         username = self._user_repo.get_username_by_email(email)
-        hashed_bytes = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt(BCRYPT_SALT_ROUNDS))
-        hashed_str = base64.b64encode(hashed_bytes).decode("utf-8")
+        hashed_str = password_hasher.make_password_hash(new_password)
         user_id = self._user_repo.get_user_id_by_username(username)
-        self._user_repo.update_user_by_id(user_id, {"password": hashed_str})
-        self._cursor.connection.commit()
+        with transaction(self._cursor):
+            self._user_repo.update_user_by_id(user_id, {"password": hashed_str})
         return self._token_service.build_token(username)
 
-
-def safe_decode_password(stored_str):
-    try:
-        return base64.b64decode(stored_str)
-    except (binascii.Error, ValueError):
-        if isinstance(stored_str, str):
-            return stored_str.encode("utf-8")
-        return stored_str
@@ -0,0 +1,130 @@
+import inspect, json, time
+from db.user_db import UserRepository
+from logic.actions import DictionaryActions, UserActions, BlockActions, TokenValidator
+from logic.auth import TokenService, AuthService
+from logic.revocation import get_revocation_list
+
+ACTION_CLASSES = (DictionaryActions, UserActions, BlockActions)
+SESSION_PARAMETERS = ("author_username", "current_username", "current_admin_username")
+
+
+class BatchCommandError(Exception):
+    pass
+
+
+def _build_commands():
+    commands = {}
+    for action_class in ACTION_CLASSES:
+        for name, method in vars(action_class).items():
+            if hasattr(method, "allowed_roles"):
+                commands[name] = (action_class, name, inspect.signature(method).parameters)
+    return commands
+
+
+COMMANDS = _build_commands()
+
+
+def _public(value):
+    # results of the user listings carry password hashes, never write those out
+    if isinstance(value, dict):
+        return {key: _public(item) for key, item in value.items() if key != "password"}
+    if isinstance(value, (list, tuple)):
+        return [_public(item) for item in value]
+    return value
+
+
+class BatchRunner:
+    def __init__(self, cursor, stop_on_error=False):
+        user_repo = UserRepository(cursor)
+        self._auth_service = AuthService(user_repo, TokenService(user_repo), cursor)
+        self._messages = []
+        self._actions = {action_class: action_class(cursor, output=self._messages.append)
+                         for action_class in ACTION_CLASSES}
+        self._revocations = get_revocation_list(cursor)
+        self._tokens = {}
+        self._credentials = None
+        self.stop_on_error = stop_on_error
+        self.logins = 0
+
+    def _login(self, username, password, renew=False):
+        key = (username, password)
+        if renew or key not in self._tokens:
+            self.logins += 1
+            self._tokens[key] = self._auth_service.login_user(username, password)
+        return self._tokens[key]
+
+    def _authenticate(self, command):
+        if command.get("token"):
+            auth = TokenValidator.decode(command["token"], self._revocations)
+            if auth is None:
+                raise BatchCommandError("Invalid or expired token.")
+            return auth
+        credentials = command.get("credentials") or self._credentials
+        if not credentials or not credentials.get("username") or not credentials.get("password"):
+            raise BatchCommandError("No credentials: add a login line or 'credentials' to the command.")
+        username, password = credentials["username"], credentials["password"]
+        token = self._login(username, password)
+        if not token:
+            raise BatchCommandError(f"Login failed for '{username}'.")
+        auth = TokenValidator.decode(token, self._revocations)
+        if auth is None:
+            # tokens are short lived, a long batch logs in again when one runs out
+            auth = TokenValidator.decode(self._login(username, password, renew=True), self._revocations)
+        if auth is None:
+            raise BatchCommandError(f"Login failed for '{username}'.")
+        return auth
+
+    def run_command(self, command):
+        if "login" in command:
+            self._credentials = command["login"]
+            if not self._login(self._credentials.get("username"), self._credentials.get("password")):
+                raise BatchCommandError(f"Login failed for '{self._credentials.get('username')}'.")
+            return True
+        name = command.get("action")
+        if name not in COMMANDS:
+            raise BatchCommandError(f"Unknown action '{name}'.")
+        action_class, method_name, parameters = COMMANDS[name]
+        args = command.get("args") or {}
+        if not isinstance(args, dict):
+            raise BatchCommandError("'args' must be a JSON object.")
+        auth = self._authenticate(command)
+        args = dict(args)
+        for parameter in SESSION_PARAMETERS:
+            if parameter in parameters and parameters[parameter].default is inspect.Parameter.empty:
+                # always the authenticated user, a command cannot act on behalf of someone else
+                if args.get(parameter, auth.subject) != auth.subject:
+                    raise BatchCommandError(f"'{parameter}' must be the logged-in user '{auth.subject}'.")
+                args[parameter] = auth.subject
+        result = getattr(self._actions[action_class], method_name)(**args, auth=auth)
+        if result == "":
+            raise BatchCommandError(f"Role '{auth.role}' is not allowed to run '{name}'.")
+        return result
+
+    def run(self, lines):
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            self._messages.clear()
+            started = time.perf_counter()
+            record = {"line": number}
+            try:
+                command = json.loads(line)
+                if not isinstance(command, dict):
+                    raise BatchCommandError("Each line must be a JSON object.")
+                if "id" in command:
+                    record["id"] = command["id"]
+                record["action"] = "login" if "login" in command else command.get("action")
+                result = self.run_command(command)
+                record["ok"] = result is not None
+                record["result"] = _public(result)
+            except (ValueError, TypeError, BatchCommandError) as e:
+                record["ok"] = False
+                record["error"] = str(e)
+            except Exception as e:
+                record["ok"] = False
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["messages"] = list(self._messages)
+            record["ms"] = round((time.perf_counter() - started) * 1000, 3)
+            yield record
+            if self.stop_on_error and not record["ok"]:
+                return
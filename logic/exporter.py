@@ -0,0 +1,53 @@
+import csv, json, os, time
+from db.word_db import WordRepository
+from logic.importer import open_text
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+class WordExporter:
+    def __init__(self, cursor, progress=None, progress_every=100000):
+        self.cursor = cursor
+        self.word_repo = WordRepository(cursor)
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def export(self, path, file_format, with_authors=True, author_username=None, min_id=None, max_id=None):
+        columns = ["id", "english_word", "persian_word"] + (["author"] if with_authors else [])
+        started = time.perf_counter()
+        written = 0
+        connection = self.cursor.connection
+        # one read transaction for the whole export, so every row comes from the same snapshot
+        in_transaction = connection.in_transaction
+        if not in_transaction:
+            self.cursor.execute("BEGIN")
+        try:
+            with open_text(path, "w") as f:
+                writer = csv.writer(f) if file_format == "csv" else None
+                if writer is not None:
+                    writer.writerow(columns)
+                rows = self.word_repo.iter_export_rows(with_authors, author_username, min_id, max_id)
+                for row in rows:
+                    if writer is not None:
+                        writer.writerow(row)
+                    else:
+                        f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+                    written += 1
+                    if self.progress is not None and written % self.progress_every == 0:
+                        self.progress(f"{written} rows written")
+        finally:
+            if not in_transaction:
+                connection.rollback()
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": written,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(written / elapsed) if elapsed > 0 else written
+        }
+
+
+def snapshot_database(cursor, path):
+    # VACUUM INTO reads from a single snapshot and writes a compact, self-contained copy
+    if os.path.exists(path):
+        raise Exception(f"[*][snapshot_database]Export error: '{path}' already exists")
+    cursor.execute("VACUUM INTO ?", (path,))
@@ -0,0 +1,173 @@
+import base64, binascii, multiprocessing, threading, time
+import bcrypt
+from concurrent.futures import ProcessPoolExecutor
+from setting import BCRYPT_SALT_ROUNDS, HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING, HASH_POOL_WAIT
+from db.connection import connect, transaction
+from db.user_db import UserRepository
+
+
+HASH_FORMAT_VERSION = "v1"
+HASH_ALGORITHM = "bcrypt"
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+def encode_password_hash(hashed_bytes, rounds):
+    # "v1:bcrypt:<cost>:<bcrypt hash>"; the bcrypt alphabet never contains ":"
+    return f"{HASH_FORMAT_VERSION}:{HASH_ALGORITHM}:{rounds}:{hashed_bytes.decode('ascii')}"
+
+
+def parse_password_hash(stored):
+    # returns (algorithm, cost, hash bytes, is_versioned); understands the legacy raw and base64-wrapped bcrypt
+    if isinstance(stored, (bytes, bytearray)):
+        stored = bytes(stored).decode("utf-8")
+    if stored.startswith(HASH_FORMAT_VERSION + ":"):
+        _, algorithm, cost, digest = stored.split(":", 3)
+        return algorithm, int(cost), digest.encode("ascii"), True
+    if not stored.startswith("$2"):
+        try:
+            stored = base64.b64decode(stored, validate=True).decode("ascii")
+        except (binascii.Error, ValueError):
+            raise ValueError("[*][parse_password_hash]Hashing error: unknown password hash format")
+    if not stored.startswith("$2"):
+        raise ValueError("[*][parse_password_hash]Hashing error: unknown password hash format")
+    return HASH_ALGORITHM, int(stored[4:6]), stored.encode("ascii"), False
+
+
+def _hash_password(password_bytes, rounds):
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds))
+
+
+def _check_password(password_bytes, hashed_bytes):
+    return bcrypt.checkpw(password_bytes, hashed_bytes)
+
+
+class PasswordHasher:
+    def __init__(self, workers=HASH_POOL_WORKERS, max_pending=HASH_POOL_MAX_PENDING, wait=HASH_POOL_WAIT,
+                 rounds=BCRYPT_SALT_ROUNDS):
+        self.rounds = rounds
+        self._workers = workers
+        self._wait = wait
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # the pool is started lazily from threads, and forking a threaded process can
+                    # copy a lock some other thread holds, so workers come from a forkserver
+                    self._executor = ProcessPoolExecutor(max_workers=self._workers,
+                                                         mp_context=multiprocessing.get_context("forkserver"))
+        return self._executor
+
+    def _release(self, _future=None):
+        self._slots.release()
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self._wait):
+            raise HashingBusyError("[*][PasswordHasher]Hashing error: too many password hashes queued")
+        if self._workers <= 0:
+            # inline mode, for scripts and benchmarks that should not fork
+            try:
+                return func(*args)
+            finally:
+                self._release()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future.result()
+
+    def hash_password(self, password: str) -> bytes:
+        return self._run(_hash_password, password.encode(), self.rounds)
+
+    def check_password(self, password: str, hashed: bytes) -> bool:
+        return self._run(_check_password, password.encode(), hashed)
+
+    def make_password_hash(self, password: str) -> str:
+        return encode_password_hash(self.hash_password(password), self.rounds)
+
+    def verify_password(self, password: str, stored):
+        # returns (matches, needs_rehash)
+        algorithm, cost, digest, versioned = parse_password_hash(stored)
+        if algorithm != HASH_ALGORITHM:
+            raise ValueError(f"[*][verify_password]Hashing error: unsupported algorithm '{algorithm}'")
+        if not self.check_password(password, digest):
+            return False, False
+        return True, cost != self.rounds or not versioned
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def migrate_password_hashes(cursor, batch_size=500, progress=None):
+    # rewrites legacy rows into the versioned format; no rehash, the cost is read from the bcrypt hash
+    user_repo = UserRepository(cursor)
+    after_id = 0
+    migrated = 0
+    while True:
+        rows = user_repo.get_password_hash_page(after_id, batch_size)
+        if not rows:
+            return migrated
+        updates = []
+        for user_id, stored in rows:
+            try:
+                algorithm, cost, digest, versioned = parse_password_hash(stored)
+            except ValueError:
+                continue
+            if not versioned:
+                updates.append((encode_password_hash(digest, cost), user_id, stored))
+        if updates:
+            # a reset or login rehash may have committed since the page was read
+            with transaction(cursor):
+                migrated += user_repo.update_password_hashes(updates)
+            if progress is not None:
+                progress(f"{migrated} password hashes migrated")
+        after_id = rows[-1][0]
+
+
+def start_password_migration(database):
+    def run():
+        conn = connect(database)
+        try:
+            migrate_password_hashes(conn.cursor())
+        finally:
+            conn.close()
+
+    thread = threading.Thread(target=run, name="password-hash-migration", daemon=True)
+    thread.start()
+    return thread
+
+
+def measure_cost(rounds, samples=3):
+    password = b"calibration-password"
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def calibrate_cost(target_ms, min_rounds=10, max_rounds=16, report=None):
+    # highest cost whose single-hash latency stays under target on this machine
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed_ms = measure_cost(rounds)
+        if report is not None:
+            report(rounds, elapsed_ms)
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,108 @@
+import csv, gzip, json, time
+from setting import MAX_WORD_LENGTH, IMPORT_BATCH_SIZE, IMPORT_COMMIT_ROWS
+from db.word_db import WordRepository
+from db.user_db import UserRepository
+from db.translation_cache import translation_cache
+from logic.suggest import get_suggestions
+
+IMPORT_FORMATS = ("csv", "tsv", "jsonl")
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = name.rsplit(".", 1)[-1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise Exception(f"[*][detect_format]Import error: cannot detect format of '{path}', use --format")
+    return extension
+
+
+def open_text(path, mode="r"):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def read_word_rows(f, file_format):
+    # yields (english_word, persian_word) pairs; files carry an english_word/persian_word header or keys
+    if file_format == "jsonl":
+        for line in f:
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict):
+                    # counted as an invalid row rather than aborting the import
+                    yield None, None
+                    continue
+                yield record.get("english_word"), record.get("persian_word")
+        return
+    reader = csv.DictReader(f, delimiter="\t" if file_format == "tsv" else ",")
+    for record in reader:
+        yield record.get("english_word"), record.get("persian_word")
+
+
+class WordImporter:
+    def __init__(self, cursor, batch_size=IMPORT_BATCH_SIZE, commit_rows=IMPORT_COMMIT_ROWS, progress=None):
+        self.cursor = cursor
+        self.word_repo = WordRepository(cursor, cache=translation_cache)
+        self.user_repo = UserRepository(cursor)
+        self.suggestions = get_suggestions(cursor)
+        self.batch_size = batch_size
+        self.commit_rows = commit_rows
+        self.progress = progress
+
+    def run(self, rows, author_username):
+        author_id = self.user_repo.get_user_id_by_username(author_username)
+        report = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+        started = time.perf_counter()
+        rows = iter(rows)
+        done = False
+        while not done:
+            inserted = []
+            with self.word_repo.transaction():
+                done = self._insert_chunk(rows, author_id, report, inserted)
+            # only after the commit, like the single-word actions
+            for en_word, fa_word in inserted:
+                self.suggestions.word_added(en_word, fa_word)
+            if not done:
+                self._report_progress(report, started)
+        elapsed = time.perf_counter() - started
+        report["seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(report["read"] / elapsed) if elapsed > 0 else report["read"]
+        return report
+
+    def _insert_chunk(self, rows, author_id, report, inserted):
+        # inserts up to commit_rows valid rows in batches; True once rows is exhausted
+        batch = []
+        uncommitted = 0
+        for en_word, fa_word in rows:
+            report["read"] += 1
+            en_word = (en_word or "").strip()
+            fa_word = (fa_word or "").strip()
+            if not en_word or not fa_word or len(en_word) > MAX_WORD_LENGTH or len(fa_word) > MAX_WORD_LENGTH:
+                report["invalid"] += 1
+                continue
+            batch.append((en_word, fa_word))
+            if len(batch) >= self.batch_size:
+                uncommitted += self._flush(batch, author_id, report, inserted)
+                batch = []
+                if uncommitted >= self.commit_rows:
+                    return False
+        if batch:
+            self._flush(batch, author_id, report, inserted)
+        return True
+
+    def _flush(self, batch, author_id, report, inserted):
+        new_rows = self.word_repo.insert_words(batch, author_id)
+        inserted.extend(new_rows)
+        report["inserted"] += len(new_rows)
+        report["duplicates"] += len(batch) - len(new_rows)
+        return len(batch)
+
+    def _report_progress(self, report, started):
+        if self.progress is None:
+            return
+        elapsed = time.perf_counter() - started
+        rate = report["read"] / elapsed if elapsed > 0 else 0
+        self.progress(f"{report['read']} rows read, {report['inserted']} inserted, {rate:.0f} rows/s")
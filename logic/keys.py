@@ -0,0 +1,126 @@
+import os, threading, time
+from cryptography.hazmat.primitives import serialization
+from setting import PUBLIC_KEY_PATH, PUBLIC_KEY_RING, KEY_RELOAD_INTERVAL, PRIVATE_KEY_PATH, PRIVATE_KEY_PASSWORD, \
+    SIGNING_KEY_ID
+
+DEFAULT_KEY_ID = "default"
+
+
+def parse_key_ring_setting(value):
+    # "kid=path,kid=path" -> {"kid": "path"}
+    paths = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        kid, _, path = item.partition("=")
+        if not kid.strip() or not path.strip():
+            raise Exception(f"[*][parse_key_ring_setting]Config error: invalid key ring entry '{item}'")
+        paths[kid.strip()] = path.strip()
+    return paths
+
+
+class PublicKeyRing:
+    def __init__(self, key_paths, reload_interval=KEY_RELOAD_INTERVAL):
+        self._paths = dict(key_paths)
+        self._reload_interval = reload_interval
+        self._keys = {}
+        self._mtimes = {}
+        self._checked_at = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_key(self, kid, path):
+        with self._lock:
+            self._paths[kid] = path
+            self._checked_at = None
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def refresh_if_due(self):
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is None or now - checked_at >= self._reload_interval:
+            self._refresh(now)
+
+    def get_key(self, kid=DEFAULT_KEY_ID):
+        self.refresh_if_due()
+        return self._keys.get(kid)
+
+    def _refresh(self, now):
+        changed = False
+        with self._lock:
+            for kid, path in self._paths.items():
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    if self._keys.pop(kid, None) is not None:
+                        changed = True
+                    self._mtimes.pop(kid, None)
+                    continue
+                if self._mtimes.get(kid) == mtime:
+                    continue
+                try:
+                    with open(path, "rb") as f:
+                        self._keys[kid] = serialization.load_pem_public_key(f.read())
+                except ValueError:
+                    # half-written file during rotation; keep the old key and retry next time
+                    continue
+                self._mtimes[kid] = mtime
+                changed = True
+            self._checked_at = now
+        if changed:
+            for callback in self._listeners:
+                callback()
+
+
+class PrivateKeySigner:
+    def __init__(self, path, password, kid=DEFAULT_KEY_ID, reload_interval=KEY_RELOAD_INTERVAL):
+        self.kid = kid
+        self._path = path
+        self._password = password.encode("utf-8") if isinstance(password, str) else password
+        self._reload_interval = reload_interval
+        self._key = None
+        self._mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self._reload_interval:
+            return self._key
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self._reload_interval:
+                return self._key
+            try:
+                mtime = os.stat(self._path).st_mtime_ns
+            except FileNotFoundError:
+                if self._key is None:
+                    raise Exception("[*][PrivateKeySigner]Config error: private key file not found")
+                # keep signing with the key we already have until the new file shows up
+                self._checked_at = now
+                return self._key
+            if mtime != self._mtime:
+                try:
+                    with open(self._path, "rb") as f:
+                        self._key = serialization.load_pem_private_key(f.read(), password=self._password)
+                    self._mtime = mtime
+                except ValueError:
+                    if self._key is None:
+                        raise
+            self._checked_at = now
+            return self._key
+
+    def sign(self, data: bytes) -> bytes:
+        return self.load().sign(data)
+
+
+def build_default_key_ring():
+    paths = {DEFAULT_KEY_ID: PUBLIC_KEY_PATH}
+    paths.update(parse_key_ring_setting(PUBLIC_KEY_RING))
+    return PublicKeyRing(paths)
+
+
+public_key_ring = build_default_key_ring()
+signer = PrivateKeySigner(PRIVATE_KEY_PATH, PRIVATE_KEY_PASSWORD, kid=SIGNING_KEY_ID)
@@ -0,0 +1,174 @@
+import random, smtplib, threading, time
+from email.mime.text import MIMEText
+from setting import (CONNECTION_DATABASE, SMTP_HOST, SMTP_PORT, SMTP_USE_SSL, SMTP_TIMEOUT, SMTP_IDLE_CHECK,
+                     SENDER_EMAIL, APP_PASSWORD, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL, OUTBOX_MAX_ATTEMPTS,
+                     OUTBOX_BACKOFF_BASE, OUTBOX_BACKOFF_MAX)
+from db.connection import connect, transaction
+from db.outbox_db import OutboxRepository
+
+# errors that will not go away by sending again
+PERMANENT_SMTP_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+
+def build_message(recipient, subject, body, sender=SENDER_EMAIL):
+    message = MIMEText(body)
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = recipient
+    return message
+
+
+def retry_delay(attempts, base=OUTBOX_BACKOFF_BASE, maximum=OUTBOX_BACKOFF_MAX):
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SmtpConnection:
+    # one authenticated session reused for every message until the server drops it
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, use_ssl=SMTP_USE_SSL, username=SENDER_EMAIL,
+                 password=APP_PASSWORD, timeout=SMTP_TIMEOUT, idle_check=SMTP_IDLE_CHECK):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._server = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    @property
+    def connected(self):
+        return self._server is not None
+
+    def _open(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.password:
+            server.login(self.username, self.password)
+        self.connects += 1
+        return server
+
+    def _alive(self):
+        if time.monotonic() - self._last_used < self.idle_check:
+            return True
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, message):
+        if self._server is not None and not self._alive():
+            self.close()
+        if self._server is None:
+            self._server = self._open()
+        try:
+            self._server.send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+class OutboxSender:
+    def __init__(self, database=CONNECTION_DATABASE, smtp=None, batch_size=OUTBOX_BATCH_SIZE,
+                 poll_interval=OUTBOX_POLL_INTERVAL, max_attempts=OUTBOX_MAX_ATTEMPTS):
+        self.database = database
+        self.smtp = smtp or SmtpConnection()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def send_due(self, cursor):
+        # returns (sent, retried, failed) for one batch
+        outbox = OutboxRepository(cursor)
+        with transaction(cursor):
+            outbox.expire_messages(time.time())
+        messages = outbox.get_due_messages(time.time(), self.batch_size)
+        sent_ids, retries, failures = [], [], []
+        for message in messages:
+            try:
+                self.smtp.send(build_message(message["recipient"], message["subject"], message["body"]))
+                sent_ids.append(message["id"])
+            except PERMANENT_SMTP_ERRORS as e:
+                failures.append((message["id"], str(e)))
+            except (smtplib.SMTPException, OSError) as e:
+                attempts = message["attempts"] + 1
+                if attempts >= self.max_attempts:
+                    failures.append((message["id"], str(e)))
+                else:
+                    retries.append((message["id"], time.time() + retry_delay(attempts), str(e)))
+                if not self.smtp.connected:
+                    # the connection is gone, the rest of the batch waits for the next round
+                    break
+        with transaction(cursor):
+            outbox.mark_sent(sent_ids, time.time())
+            for message_id, next_attempt_at, error in retries:
+                outbox.mark_retry(message_id, next_attempt_at, error)
+            for message_id, error in failures:
+                outbox.mark_failed(message_id, error)
+        return len(sent_ids), len(retries), len(failures)
+
+    def drain(self, cursor):
+        totals = [0, 0, 0]
+        while True:
+            sent, retried, failed = self.send_due(cursor)
+            totals = [totals[0] + sent, totals[1] + retried, totals[2] + failed]
+            if sent + retried + failed < self.batch_size or retried:
+                return tuple(totals)
+
+    def _run(self):
+        conn = connect(self.database)
+        cursor = conn.cursor()
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                try:
+                    self.drain(cursor)
+                except Exception as e:
+                    print("[*][OutboxSender] Error:", e)
+                self._wake.wait(self.poll_interval)
+        finally:
+            self.smtp.close()
+            conn.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def queue_email(cursor, recipient, subject, body, expires_at=None):
+    with transaction(cursor):
+        message_id = OutboxRepository(cursor).enqueue(recipient, subject, body, time.time(), expires_at)
+    outbox_sender.wake()
+    return message_id
+
+
+outbox_sender = OutboxSender()
@@ -0,0 +1,140 @@
+import atexit, cProfile, json, os, pstats, random, re, sys, threading, time
+from collections import Counter
+from contextlib import contextmanager
+from setting import PROFILE_DIR, PROFILE_MODE, PROFILE_SLOW_MS, PROFILE_SAMPLE_RATE, PROFILE_SAMPLE_INTERVAL
+
+PROFILE_MODES = ("sample", "cprofile", "both")
+MAX_STACK_DEPTH = 128
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    # one background thread samples the stacks of every thread that is inside a profiled call
+    def __init__(self, interval):
+        self.interval = interval
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, thread_id, entry_frame, root, samples):
+        with self._lock:
+            self._watched[thread_id] = (entry_frame, root, samples)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            self._watched.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched = list(self._watched.items())
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, (entry_frame, root, samples) in watched:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and frame is not entry_frame and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(root)
+                samples[";".join(reversed(stack))] += 1
+
+
+class ActionProfiler:
+    def __init__(self, directory=PROFILE_DIR, mode=PROFILE_MODE, slow_ms=PROFILE_SLOW_MS,
+                 sample_rate=PROFILE_SAMPLE_RATE, interval=PROFILE_SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"[*][ActionProfiler]Config error: PROFILE_MODE must be one of {', '.join(PROFILE_MODES)}")
+        self.enabled = bool(directory)
+        self.directory = directory
+        self.mode = mode
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self._sampler = StackSampler(interval)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # newer interpreters allow only one active cProfile per process
+        self._cprofile_lock = threading.Lock()
+        self._stats = {}
+        self._folded = {}
+        self._summary = {}
+
+    @contextmanager
+    def profile(self, name):
+        if not self.enabled or getattr(self._local, "active", False) or random.random() >= self.sample_rate:
+            yield
+            return
+        self._local.active = True
+        thread_id = threading.get_ident()
+        samples = None
+        if self.mode in ("sample", "both"):
+            samples = Counter()
+            # frame 0 is this generator, 1 is contextlib's __enter__, 2 runs the with block
+            self._sampler.watch(thread_id, sys._getframe(2), name, samples)
+        profile = None
+        if self.mode in ("cprofile", "both") and self._cprofile_lock.acquire(blocking=False):
+            profile = cProfile.Profile()
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if profile is not None:
+                profile.disable()
+                self._cprofile_lock.release()
+            if samples is not None:
+                self._sampler.unwatch(thread_id)
+            self._local.active = False
+            self._record(name, elapsed_ms, profile, samples)
+
+    def _record(self, name, elapsed_ms, profile, samples):
+        with self._lock:
+            summary = self._summary.setdefault(name, {"sampled": 0, "recorded": 0, "total_ms": 0.0, "max_ms": 0.0})
+            summary["sampled"] += 1
+            if elapsed_ms < self.slow_ms:
+                return
+            summary["recorded"] += 1
+            summary["total_ms"] += elapsed_ms
+            summary["max_ms"] = max(summary["max_ms"], elapsed_ms)
+            if profile is not None:
+                if name in self._stats:
+                    self._stats[name].add(profile)
+                else:
+                    self._stats[name] = pstats.Stats(profile)
+            if samples:
+                self._folded.setdefault(name, Counter()).update(samples)
+
+    def flush(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            for name, stats in self._stats.items():
+                stats.dump_stats(self._path(name, ".prof"))
+            for name, folded in self._folded.items():
+                with open(self._path(name, ".folded"), "w", encoding="utf-8") as f:
+                    for stack, count in folded.most_common():
+                        f.write(f"{stack} {count}\n")
+            summary = {name: dict(values, total_ms=round(values["total_ms"], 3), max_ms=round(values["max_ms"], 3))
+                       for name, values in self._summary.items()}
+        with open(os.path.join(self.directory, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump({"mode": self.mode, "slow_ms": self.slow_ms, "sample_rate": self.sample_rate,
+                       "actions": summary}, f, indent=2)
+
+    def _path(self, name, extension):
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", name) + extension)
+
+
+profiler = ActionProfiler()
+if profiler.enabled:
+    atexit.register(profiler.flush)
@@ -0,0 +1,79 @@
+import math, threading, time
+from collections import OrderedDict
+from setting import (RATE_LIMIT_MAX_KEYS, LOGIN_LIMIT_PER_USER, LOGIN_LIMIT_PER_CLIENT, SIGNUP_LIMIT_PER_CLIENT,
+                     RESET_LIMIT_PER_EMAIL, RESET_LIMIT_PER_CLIENT)
+
+
+class ThrottledError(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Too many attempts, try again in {self.retry_after} seconds.")
+
+
+class TokenBucketLimiter:
+    # capacity requests at once, refilled evenly over period seconds; least recently used keys are evicted
+    def __init__(self, capacity, period, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key, now=None):
+        # returns 0 when allowed, otherwise the seconds until a token is available
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.capacity
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                self._buckets.move_to_end(key)
+            if tokens < 1:
+                self._buckets[key] = [tokens, now]
+                return (1 - tokens) / self.rate
+            self._buckets[key] = [tokens - 1, now]
+            return 0
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AuthRateLimits:
+    def __init__(self):
+        self.login_user = TokenBucketLimiter(*LOGIN_LIMIT_PER_USER)
+        self.login_client = TokenBucketLimiter(*LOGIN_LIMIT_PER_CLIENT)
+        self.sign_up_client = TokenBucketLimiter(*SIGNUP_LIMIT_PER_CLIENT)
+        self.reset_email = TokenBucketLimiter(*RESET_LIMIT_PER_EMAIL)
+        self.reset_client = TokenBucketLimiter(*RESET_LIMIT_PER_CLIENT)
+
+    @staticmethod
+    def _check(*limits):
+        for limiter, key in limits:
+            if key is None:
+                continue
+            retry_after = limiter.acquire(key)
+            if retry_after:
+                raise ThrottledError(retry_after)
+
+    def check_login(self, username, client=None):
+        self._check((self.login_client, client), (self.login_user, username.strip().lower()))
+
+    def login_succeeded(self, username):
+        # a typo or two shouldn't count against the next session
+        self.login_user.reset(username.strip().lower())
+
+    def check_sign_up(self, client=None):
+        self._check((self.sign_up_client, client))
+
+    def check_password_reset(self, email, client=None):
+        self._check((self.reset_client, client), (self.reset_email, email.strip().lower()))
+
+
+auth_rate_limits = AuthRateLimits()
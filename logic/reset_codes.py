@@ -0,0 +1,146 @@
+import hashlib, hmac, os, secrets, threading, time
+from abc import ABC, abstractmethod
+from setting import (RESET_CODE_LENGTH, RESET_CODE_TTL, RESET_CODE_MAX_ATTEMPTS, RESET_CODE_SWEEP_INTERVAL,
+                     RESET_CODE_BACKEND, RESET_CODE_SECRET)
+from db.connection import transaction
+from db.reset_code_db import ResetCodeRepository
+
+
+def generate_reset_code(length=RESET_CODE_LENGTH):
+    return "".join(secrets.choice("0123456789") for _ in range(length))
+
+
+def hash_reset_code(secret, email, code):
+    return hmac.new(secret, f"{email}:{code}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+class ResetCodeStore(ABC):
+    # one active code per email: issue() replaces it, verify() counts attempts, consume() ends the reset
+    def __init__(self, secret, ttl=RESET_CODE_TTL, max_attempts=RESET_CODE_MAX_ATTEMPTS,
+                 sweep_interval=RESET_CODE_SWEEP_INTERVAL):
+        self._secret = secret
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def issue(self, email, code, now=None):
+        now = time.time() if now is None else now
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep(now)
+        self._store(email, self._hash(email, code), now + self.ttl)
+
+    def _hash(self, email, code):
+        return hash_reset_code(self._secret, email, code)
+
+    @abstractmethod
+    def verify(self, email, code, now=None):
+        pass
+
+    @abstractmethod
+    def consume(self, email, now=None):
+        pass
+
+    @abstractmethod
+    def sweep(self, now=None):
+        pass
+
+    @abstractmethod
+    def _store(self, email, code_hash, expires_at):
+        pass
+
+
+class MemoryResetCodeStore(ResetCodeStore):
+    def __init__(self, **kwargs):
+        # the codes die with the process, so a key of its own is enough
+        super().__init__(os.urandom(32), **kwargs)
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def _store(self, email, code_hash, expires_at):
+        with self._lock:
+            self._codes[email] = {"code_hash": code_hash, "expires_at": expires_at, "attempts": 0, "verified": False}
+
+    def verify(self, email, code, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None or entry["expires_at"] <= now:
+                self._codes.pop(email, None)
+                return False
+            entry["attempts"] += 1
+            if entry["attempts"] <= self.max_attempts and \
+                    hmac.compare_digest(entry["code_hash"], self._hash(email, code)):
+                entry["verified"] = True
+                return True
+            if entry["attempts"] >= self.max_attempts:
+                del self._codes[email]
+            return False
+
+    def consume(self, email, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None or not entry["verified"] or entry["expires_at"] <= now:
+                return False
+            del self._codes[email]
+            return True
+
+    def sweep(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [email for email, entry in self._codes.items() if entry["expires_at"] <= now]
+            for email in expired:
+                del self._codes[email]
+        return len(expired)
+
+
+class SqliteResetCodeStore(ResetCodeStore):
+    def __init__(self, cursor, secret=RESET_CODE_SECRET, **kwargs):
+        # stored codes are checked by every worker and survive restarts, so the key has to as well
+        if not secret:
+            raise ValueError("[*][SqliteResetCodeStore]Config error: RESET_CODE_SECRET is required with the sqlite "
+                             "backend")
+        super().__init__(secret.encode("utf-8") if isinstance(secret, str) else secret, **kwargs)
+        self._cursor = cursor
+        self._repo = ResetCodeRepository(cursor)
+
+    def _store(self, email, code_hash, expires_at):
+        with transaction(self._cursor):
+            self._repo.upsert_code(email, code_hash, expires_at)
+
+    def verify(self, email, code, now=None):
+        now = time.time() if now is None else now
+        with transaction(self._cursor):
+            entry = self._repo.count_attempt(email, now)
+            if entry is None:
+                return False
+            if entry["attempts"] <= self.max_attempts and \
+                    hmac.compare_digest(entry["code_hash"], self._hash(email, code)):
+                self._repo.mark_verified(email)
+                return True
+            if entry["attempts"] >= self.max_attempts:
+                self._repo.delete_code(email)
+            return False
+
+    def consume(self, email, now=None):
+        now = time.time() if now is None else now
+        with transaction(self._cursor):
+            return self._repo.consume_verified(email, now)
+
+    def sweep(self, now=None):
+        now = time.time() if now is None else now
+        with transaction(self._cursor):
+            return self._repo.delete_expired(now)
+
+
+memory_reset_codes = MemoryResetCodeStore()
+
+
+def get_reset_code_store(cursor):
+    if RESET_CODE_BACKEND == "memory":
+        return memory_reset_codes
+    if RESET_CODE_BACKEND == "sqlite":
+        return SqliteResetCodeStore(cursor)
+    raise ValueError(f"[*][get_reset_code_store]Config error: unknown RESET_CODE_BACKEND '{RESET_CODE_BACKEND}'")
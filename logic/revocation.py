@@ -0,0 +1,113 @@
+import threading, time
+from setting import CONNECTION_DATABASE, REVOCATION_REFRESH_INTERVAL, REVOCATION_SWEEP_INTERVAL, TOKEN_EXPIRATION
+from db.connection import connect, transaction, database_key, cursor_database
+from db.revocation_db import RevocationRepository
+
+
+class RevocationList:
+    # username -> newest revoked token generation, read incrementally from token_revocations
+    def __init__(self, database=CONNECTION_DATABASE, refresh_interval=REVOCATION_REFRESH_INTERVAL,
+                 ttl=TOKEN_EXPIRATION, sweep_interval=REVOCATION_SWEEP_INTERVAL):
+        self.database = database
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._entries = {}
+        self._last_id = None
+        self._checked_at = None
+        self._connection = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def _load(self, repo, now):
+        if self._last_id is None:
+            # rows older than a token lifetime cannot match an unexpired token
+            last_id = repo.get_last_revocation_id()
+            rows = repo.get_revocations_since(now - self.ttl, last_id)
+        else:
+            rows = repo.get_revocations_after(self._last_id)
+            last_id = rows[-1][0] if rows else self._last_id
+        for _, username, generation, revoked_at in rows:
+            current = self._entries.get(username)
+            if current is None or generation > current[0]:
+                self._entries[username] = (generation, revoked_at)
+        self._last_id = last_id
+
+    def _prune(self, now):
+        expired = [username for username, (_, revoked_at) in self._entries.items() if revoked_at + self.ttl < now]
+        for username in expired:
+            del self._entries[username]
+
+    def refresh(self, blocking=True):
+        if not self._lock.acquire(blocking):
+            # another thread is already reading; the current entries are at most one interval old
+            return
+        try:
+            if self._connection is None:
+                # used by whichever thread refreshes, always under self._lock
+                self._connection = connect(self.database, shared=True)
+            cursor = self._connection.cursor()
+            try:
+                now = time.time()
+                repo = RevocationRepository(cursor)
+                self._load(repo, now)
+                self._prune(now)
+                if now >= self._next_sweep:
+                    # the rows _prune dropped from memory are no use to any process either
+                    self._next_sweep = now + self.sweep_interval
+                    with transaction(cursor):
+                        repo.delete_revocations_before(now - self.ttl)
+            finally:
+                cursor.close()
+            self._checked_at = time.monotonic()
+            self.refreshes += 1
+        finally:
+            self._lock.release()
+
+    def refresh_if_due(self):
+        checked_at = self._checked_at
+        if checked_at is None:
+            self.refresh()
+        elif time.monotonic() - checked_at >= self.refresh_interval:
+            self.refresh(blocking=False)
+
+    def is_revoked(self, auth):
+        self.refresh_if_due()
+        entry = self._entries.get(auth.subject)
+        return entry is not None and auth.generation < entry[0]
+
+    def invalidate(self):
+        # called after a local write so this process sees its own revocations immediately
+        if self._checked_at is not None:
+            self.refresh()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_revocation_lists = {}
+_revocation_lists_lock = threading.Lock()
+
+
+def revocation_list_for(database):
+    # one list per database file, shared by every connection opened on it
+    key = database_key(database)
+    with _revocation_lists_lock:
+        revocation_list = _revocation_lists.get(key)
+        if revocation_list is None:
+            revocation_list = _revocation_lists[key] = RevocationList(database)
+        return revocation_list
+
+
+def get_revocation_list(cursor):
+    return revocation_list_for(cursor_database(cursor))
+
+
+revocations = revocation_list_for(CONNECTION_DATABASE)
@@ -0,0 +1,181 @@
+import heapq, threading
+from collections import Counter
+from setting import CONNECTION_DATABASE
+from db.connection import connect, database_key, cursor_database
+from db.word_db import WordRepository
+
+
+def _trigrams(word):
+    padded = f"  {word.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, start=1):
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class TrigramIndex:
+    def __init__(self):
+        self._postings = {}
+        self._word_ids = {}
+        self._words = {}
+        self._refs = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._word_ids)
+
+    def add(self, word, count=1):
+        with self._lock:
+            word_id = self._word_ids.get(word)
+            if word_id is not None:
+                self._refs[word_id] += count
+                return
+            word_id = self._next_id
+            self._next_id += 1
+            self._word_ids[word] = word_id
+            self._words[word_id] = word
+            self._refs[word_id] = count
+            for gram in _trigrams(word):
+                self._postings.setdefault(gram, set()).add(word_id)
+
+    def remove(self, word):
+        with self._lock:
+            word_id = self._word_ids.get(word)
+            if word_id is None:
+                return
+            self._refs[word_id] -= 1
+            if self._refs[word_id] > 0:
+                return
+            del self._refs[word_id], self._word_ids[word], self._words[word_id]
+            for gram in _trigrams(word):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(word_id)
+                    if not posting:
+                        del self._postings[gram]
+
+    def suggest(self, word, k=5, max_distance=3, candidate_limit=64):
+        grams = _trigrams(word)
+        with self._lock:
+            postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            # a close match has to share at least a third of the query trigrams, so it must
+            # appear in one of the rarest len - min_shared + 1 postings (prefix filtering)
+            min_shared = max(1, len(postings) // 3)
+            probe, rest = postings[:len(postings) - min_shared + 1], postings[len(postings) - min_shared + 1:]
+            overlap = Counter()
+            for posting in probe:
+                overlap.update(posting)
+            for word_id in overlap:
+                overlap[word_id] += sum(1 for posting in rest if word_id in posting)
+            best = heapq.nlargest(candidate_limit, (item for item in overlap.items() if item[1] >= min_shared),
+                                  key=lambda item: item[1])
+            candidates = [self._words[word_id] for word_id, _ in best]
+        lowered = word.lower()
+        scored = []
+        for candidate in candidates:
+            distance = edit_distance(lowered, candidate.lower(), max_distance)
+            if distance <= max_distance:
+                scored.append((distance, candidate))
+        return [candidate for _, candidate in heapq.nsmallest(k, scored)]
+
+
+class DictionarySuggestions:
+    # built from its own connection in a background thread; lookups get no suggestions until it is ready
+    def __init__(self, database=CONNECTION_DATABASE):
+        self.database = database
+        self.english = TrigramIndex()
+        self.persian = TrigramIndex()
+        self._loaded = False
+        self._loader = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def start_loading(self):
+        with self._lock:
+            if self._loader is not None:
+                return
+            self._loader = threading.Thread(target=self._load, name="suggestions-loader", daemon=True)
+        self._loader.start()
+
+    def wait_loaded(self, timeout=None):
+        self.start_loading()
+        self._loader.join(timeout)
+        return self._loaded
+
+    def _load(self):
+        connection = connect(self.database)
+        try:
+            word_repo = WordRepository(connection.cursor())
+            for en_word, count in word_repo.get_distinct_english_words():
+                self.english.add(en_word, count)
+            for fa_word, count in word_repo.get_distinct_persian_words():
+                self.persian.add(fa_word, count)
+        finally:
+            connection.close()
+        with self._lock:
+            # changes made while the words were being read
+            for change, en_word, fa_word in self._pending:
+                change(self.english, en_word)
+                change(self.persian, fa_word)
+            self._pending = []
+            self._loaded = True
+
+    def suggest_english(self, word, k=5):
+        self.start_loading()
+        return self.english.suggest(word, k) if self._loaded else []
+
+    def suggest_persian(self, word, k=5):
+        self.start_loading()
+        return self.persian.suggest(word, k) if self._loaded else []
+
+    def _apply(self, change, en_word, fa_word):
+        with self._lock:
+            if self._loaded:
+                change(self.english, en_word)
+                change(self.persian, fa_word)
+            elif self._loader is not None:
+                self._pending.append((change, en_word, fa_word))
+
+    def word_added(self, en_word, fa_word):
+        self._apply(TrigramIndex.add, en_word, fa_word)
+
+    def word_removed(self, en_word, fa_word):
+        self._apply(TrigramIndex.remove, en_word, fa_word)
+
+
+_suggestion_indexes = {}
+_suggestion_indexes_lock = threading.Lock()
+
+
+def suggestions_for(database):
+    # one index per database file, like the revocation lists
+    key = database_key(database)
+    with _suggestion_indexes_lock:
+        index = _suggestion_indexes.get(key)
+        if index is None:
+            index = _suggestion_indexes[key] = DictionarySuggestions(database)
+        return index
+
+
+def get_suggestions(cursor):
+    return suggestions_for(cursor_database(cursor))
@@ -0,0 +1,42 @@
+import re
+
+ZWNJ = "\u200c"
+_PERSIAN_CHARS = str.maketrans({
+    "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+    "\u0649": "\u06cc",  # alef maksura -> Persian yeh
+    "\u0643": "\u06a9",  # Arabic kaf -> Persian kaf
+    "\u0640": None,  # tatweel
+})
+_DIACRITICS = re.compile("[\u064b-\u0652\u0670]")
+_WORD = re.compile("[\\w\u200c]+")
+_ARABIC_SCRIPT = re.compile("[\u0600-\u06ff]")
+
+
+# stored words are compared through dictionary_entries.persian_key, a copy of these rules in SQL
+def normalize_persian(text):
+    return _DIACRITICS.sub("", text.translate(_PERSIAN_CHARS))
+
+
+def is_persian(word):
+    return _ARABIC_SCRIPT.search(word) is not None
+
+
+def tokenize_text(text):
+    # compound words keep their inner zero-width non-joiners
+    tokens = []
+    for match in _WORD.finditer(normalize_persian(text)):
+        token = match.group().strip(ZWNJ)
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def phrase_candidates(tokens, max_words):
+    # every run of 1..max_words consecutive tokens, so multi-word entries can match as a whole
+    candidates = set()
+    for start in range(len(tokens)):
+        for size in range(1, max_words + 1):
+            if start + size > len(tokens):
+                break
+            candidates.add(" ".join(tokens[start:start + size]))
+    return candidates
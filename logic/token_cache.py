@@ -0,0 +1,44 @@
+import threading, time
+from collections import OrderedDict
+from setting import TOKEN_CACHE_SIZE
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size=TOKEN_CACHE_SIZE):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, exp = entry
+            if int(time.time()) > exp:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return value
+
+    def put(self, token, value, exp):
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (value, exp)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,74 @@
+import base64, binascii, struct
+
+COMPACT_TOKEN_PREFIX = "v2."
+_PREFIX_LENGTH = len(COMPACT_TOKEN_PREFIX)
+TOKEN_FORMATS = ("v1", "v2")
+TOKEN_ISSUER = "auth"
+
+# fixed header: iat, exp, gen and the byte lengths of sub, role and kid (empty for the default key),
+# followed by those three utf-8 strings
+_CLAIMS_HEADER = struct.Struct("!IIIHBB")
+
+_B64URL_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+# one bytes.translate maps the url-safe alphabet to the standard one and turns "+", "/" and "=" into
+# a byte strict a2b_base64 rejects, so the alphabet check costs nothing extra
+_B64URL_TO_STANDARD = bytes.maketrans(b"-_+/=", b"+/!!!")
+# by len(text) % 4: the padding a2b_base64 needs, and the last characters whose unused bits are zero
+_B64URL_PADDING = (b"", None, b"==", b"=")
+_CANONICAL_LAST_CHARS = {2: frozenset(_B64URL_ALPHABET[::16]), 3: frozenset(_B64URL_ALPHABET[::4])}
+
+
+def b64url_encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64url_decode(text):
+    # only the canonical spelling is accepted, otherwise one token would have many valid forms:
+    # no padding or standard-alphabet characters, no stray characters, unused trailing bits zero
+    if isinstance(text, str):
+        text = text.encode("ascii")
+    remainder = len(text) % 4
+    if remainder and (remainder == 1 or text[-1] not in _CANONICAL_LAST_CHARS[remainder]):
+        raise ValueError("[*][b64url_decode]Token error: non-canonical base64url")
+    return binascii.a2b_base64(text.translate(_B64URL_TO_STANDARD) + _B64URL_PADDING[remainder], strict_mode=True)
+
+
+def pack_claims(sub, role, iat, exp, generation, kid=""):
+    sub_bytes, role_bytes, kid_bytes = sub.encode("utf-8"), role.encode("utf-8"), kid.encode("utf-8")
+    try:
+        header = _CLAIMS_HEADER.pack(iat, exp, generation, len(sub_bytes), len(role_bytes), len(kid_bytes))
+    except struct.error:
+        raise ValueError("[*][pack_claims]Token error: claim does not fit the compact layout")
+    return header + sub_bytes + role_bytes + kid_bytes
+
+
+def unpack_claims(data):
+    iat, exp, generation, sub_length, role_length, kid_length = _CLAIMS_HEADER.unpack_from(data)
+    offset = _CLAIMS_HEADER.size
+    if offset + sub_length + role_length + kid_length != len(data):
+        raise ValueError("[*][unpack_claims]Token error: unexpected payload length")
+    role_offset = offset + sub_length
+    payload = {"sub": data[offset:role_offset].decode("utf-8"),
+               "role": data[role_offset:role_offset + role_length].decode("utf-8"),
+               "gen": generation, "iat": iat, "exp": exp, "iss": TOKEN_ISSUER}
+    if kid_length:
+        payload["kid"] = data[role_offset + role_length:].decode("utf-8")
+    return payload
+
+
+def encode_compact_token(sign, sub, role, iat, exp, generation, kid=""):
+    # the signature covers the version prefix and the encoded payload exactly as sent
+    signing_input = COMPACT_TOKEN_PREFIX + b64url_encode(pack_claims(sub, role, iat, exp, generation, kid))
+    return signing_input + "." + b64url_encode(sign(signing_input.encode("ascii")))
+
+
+def parse_compact_token(token):
+    # -> (payload, signed bytes, signature); ValueError when the token is malformed
+    # (a non-ascii token fails the encode with UnicodeEncodeError, itself a ValueError)
+    signing_input, _, signature_b64 = token.encode("ascii").rpartition(b".")
+    try:
+        payload = unpack_claims(b64url_decode(signing_input[_PREFIX_LENGTH:]))
+        signature = b64url_decode(signature_b64)
+    except (struct.error, binascii.Error):
+        raise ValueError("[*][parse_compact_token]Token error: malformed compact token")
+    return payload, signing_input, signature
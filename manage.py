@@ -0,0 +1,208 @@
+import argparse
+from setting import CONNECTION_DATABASE, IMPORT_BATCH_SIZE, API_HOST, API_PORT
+from db.migrations import apply_migrations
+from db.connection import connect
+
+
+def import_words(cursor, args):
+    from logic.importer import WordImporter, detect_format, open_text, read_word_rows
+    file_format = args.format or detect_format(args.path)
+    importer = WordImporter(cursor, batch_size=args.batch_size, progress=print)
+    with open_text(args.path) as f:
+        report = importer.run(read_word_rows(f, file_format), args.author)
+    print(f"Imported {report['inserted']} of {report['read']} rows "
+          f"({report['duplicates']} duplicates, {report['invalid']} invalid) "
+          f"in {report['seconds']}s, {report['rows_per_second']} rows/s.")
+
+
+def export_words(cursor, args):
+    from logic.exporter import WordExporter, snapshot_database
+    from logic.importer import detect_format
+    if args.snapshot:
+        snapshot_database(cursor, args.path)
+        print(f"Snapshot written to {args.path}.")
+        return
+    file_format = args.format or detect_format(args.path)
+    if file_format not in ("csv", "jsonl"):
+        print("Export supports csv and jsonl.")
+        return
+    exporter = WordExporter(cursor, progress=print)
+    report = exporter.export(args.path, file_format, with_authors=not args.no_authors,
+                             author_username=args.author, min_id=args.min_id, max_id=args.max_id)
+    print(f"Exported {report['rows']} rows in {report['seconds']}s, {report['rows_per_second']} rows/s.")
+
+
+def calibrate_bcrypt(cursor, args):
+    from logic.hashing import calibrate_cost
+    rounds = calibrate_cost(args.target_ms, args.min_rounds, args.max_rounds,
+                            report=lambda cost, ms: print(f"cost {cost}: {ms:.0f} ms"))
+    print(f"Recommended BCRYPT_SALT_ROUNDS={rounds} for a {args.target_ms} ms target.")
+
+
+def migrate_passwords(cursor, args):
+    from logic.hashing import migrate_password_hashes
+    migrated = migrate_password_hashes(cursor, args.batch_size, progress=print)
+    print(f"Migrated {migrated} password hashes to the versioned format.")
+
+
+def serve_api(cursor, args):
+    from api.server import run
+    run(args.host, args.port)
+
+
+def run_bench(cursor, args):
+    from benchmarks.micro import run_benchmarks, write_report
+    report = run_benchmarks(cursor, users=args.users, words=args.words, repeat=args.repeat,
+                            slow_repeat=args.slow_repeat, seed=args.seed, database=args.database,
+                            names=args.only,
+                            progress=lambda name, r: print(f"{name:28} p50 {r['p50_ms']:>10.4f} ms  "
+                                                           f"p95 {r['p95_ms']:>10.4f} ms  "
+                                                           f"{r['ops_per_sec']:>10.1f} ops/s"))
+    write_report(report, args.output)
+    print(f"Results written to {args.output}.")
+
+
+def run_load_test(cursor, args):
+    from benchmarks.load import run_load_test, parse_mix
+    from benchmarks.micro import write_report
+    report = run_load_test(cursor, vus=args.vus, duration=args.duration, mix=parse_mix(args.mix), mode=args.mode,
+                           busy_timeout_ms=args.busy_timeout_ms, think_ms=args.think_ms, users=args.users,
+                           words=args.words, seed=args.seed, database=args.database)
+    print(f"{report['vus']} virtual users, {report['mode']} connections, {report['seconds']}s: "
+          f"{report['completed']} actions, {report['throughput_per_sec']} actions/s, "
+          f"{report['locked']} 'database is locked', {report['errors']} other errors")
+    print(f"{'action':16} {'count':>7} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'locked':>7} {'errors':>7}")
+    for name, r in report["actions"].items():
+        print(f"{name:16} {r['runs']:>7} {r['throughput_per_sec']:>9.1f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+              f"{r['p99_ms']:>9.3f} {r['locked']:>7} {r['errors']:>7}")
+    if args.histogram:
+        for name, r in report["actions"].items():
+            print(f"\n{name}")
+            peak = max(r["histogram"].values()) or 1
+            for label, count in r["histogram"].items():
+                if count:
+                    print(f"  {label:>10} {count:>7} {'#' * max(1, count * 40 // peak)}")
+    if args.output:
+        write_report(report, args.output)
+        print(f"Results written to {args.output}.")
+
+
+def run_batch(cursor, args):
+    import json, sys
+    from logic.batch import BatchRunner
+    runner = BatchRunner(cursor, stop_on_error=args.stop_on_error)
+    succeeded = failed = 0
+    with open(args.path, encoding="utf-8") as source:
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            for record in runner.run(source):
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if record["ok"]:
+                    succeeded += 1
+                else:
+                    failed += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    print(f"{succeeded} commands succeeded, {failed} failed, {runner.logins} logins.", file=sys.stderr)
+
+
+def send_outbox(cursor, args):
+    from db.outbox_db import OutboxRepository
+    from logic.mailer import outbox_sender
+    if not args.status_only:
+        sent, retried, failed = outbox_sender.drain(cursor)
+        outbox_sender.smtp.close()
+        print(f"Sent {sent} emails, {retried} scheduled for retry, {failed} failed.")
+    counts = OutboxRepository(cursor).count_by_status()
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())) or "Outbox is empty.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Dictionary maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-words", help="bulk load words from a CSV, TSV or JSONL file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--author", required=True, help="username recorded as the author of every word")
+    import_parser.add_argument("--format", choices=("csv", "tsv", "jsonl"))
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    import_parser.set_defaults(handler=import_words)
+
+    export_parser = commands.add_parser("export-words", help="stream words to CSV or JSONL (.gz to compress)")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=("csv", "jsonl"))
+    export_parser.add_argument("--author", help="only export words by this username")
+    export_parser.add_argument("--min-id", type=int)
+    export_parser.add_argument("--max-id", type=int)
+    export_parser.add_argument("--no-authors", action="store_true", help="leave out the author column")
+    export_parser.add_argument("--snapshot", action="store_true",
+                               help="write a consistent copy of the whole database to path instead")
+    export_parser.set_defaults(handler=export_words)
+
+    calibrate_parser = commands.add_parser("calibrate-bcrypt", help="pick a bcrypt cost for a target hash latency")
+    calibrate_parser.add_argument("--target-ms", type=float, default=250)
+    calibrate_parser.add_argument("--min-rounds", type=int, default=10)
+    calibrate_parser.add_argument("--max-rounds", type=int, default=16)
+    calibrate_parser.set_defaults(handler=calibrate_bcrypt)
+
+    migrate_parser = commands.add_parser("migrate-passwords", help="rewrite legacy password hashes as v1:bcrypt:<cost>")
+    migrate_parser.add_argument("--batch-size", type=int, default=500)
+    migrate_parser.set_defaults(handler=migrate_passwords)
+
+    serve_parser = commands.add_parser("serve-api", help="run the asyncio JSON HTTP API")
+    serve_parser.add_argument("--host", default=API_HOST)
+    serve_parser.add_argument("--port", type=int, default=API_PORT)
+    serve_parser.set_defaults(handler=serve_api)
+
+    bench_parser = commands.add_parser("bench", help="time the hot paths on a generated scratch database")
+    bench_parser.add_argument("--users", type=int, default=1000)
+    bench_parser.add_argument("--words", type=int, default=50000)
+    bench_parser.add_argument("--repeat", type=int, default=1000, help="calls per fast benchmark")
+    bench_parser.add_argument("--slow-repeat", type=int, default=10,
+                              help="calls per slow benchmark (full listings, batches, bcrypt logins)")
+    bench_parser.add_argument("--seed", type=int, default=1)
+    bench_parser.add_argument("--only", nargs="+", help="benchmark names to run")
+    bench_parser.add_argument("--database", help="keep the generated dataset at this new path")
+    bench_parser.add_argument("--output", default="bench.json")
+    bench_parser.set_defaults(handler=run_bench)
+
+    load_parser = commands.add_parser("load-test", help="drive concurrent virtual users against a scratch database")
+    load_parser.add_argument("--vus", type=int, default=8, help="number of concurrent virtual users")
+    load_parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    load_parser.add_argument("--mix", help="action weights, e.g. translate_en=50,add_word=10,login=5")
+    load_parser.add_argument("--mode", choices=("per-thread", "shared"), default="per-thread",
+                             help="one connection per virtual user, or one shared connection like the CLI")
+    load_parser.add_argument("--busy-timeout-ms", type=int, help="override PRAGMA busy_timeout (0 shows raw locking)")
+    load_parser.add_argument("--think-ms", type=float, default=0, help="pause between actions of one user")
+    load_parser.add_argument("--users", type=int, default=200)
+    load_parser.add_argument("--words", type=int, default=20000)
+    load_parser.add_argument("--seed", type=int, default=1)
+    load_parser.add_argument("--database", help="reuse or keep the generated dataset at this path")
+    load_parser.add_argument("--histogram", action="store_true", help="print a latency histogram per action")
+    load_parser.add_argument("--output", help="also write the report as JSON")
+    load_parser.set_defaults(handler=run_load_test)
+
+    batch_parser = commands.add_parser("run-batch", help="run menu actions from a JSONL command file")
+    batch_parser.add_argument("path", help='lines like {"login": {"username": ..., "password": ...}} '
+                                           'or {"action": "add_new_word", "args": {...}}')
+    batch_parser.add_argument("--output", help="write JSONL results here instead of stdout")
+    batch_parser.add_argument("--stop-on-error", action="store_true")
+    batch_parser.set_defaults(handler=run_batch)
+
+    outbox_parser = commands.add_parser("send-outbox", help="deliver queued emails that are due now")
+    outbox_parser.add_argument("--status-only", action="store_true", help="only print outbox counts")
+    outbox_parser.set_defaults(handler=send_outbox)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    conn = connect(CONNECTION_DATABASE)
+    apply_migrations(conn)
+    cursor = conn.cursor()
+
+    args.handler(cursor, args)
+
+    conn.close()
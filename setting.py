@@ -1,12 +1,68 @@
+import os
 from decouple import config
 
 CONNECTION_DATABASE = config('CONNECTION_DATABASE')
-BCRYPT_SALT_ROUNDS = 12
+BCRYPT_SALT_ROUNDS = config('BCRYPT_SALT_ROUNDS', default=12, cast=int)
+HASH_POOL_WORKERS = config('HASH_POOL_WORKERS', default=os.cpu_count() or 1, cast=int)
+HASH_POOL_MAX_PENDING = 64
+HASH_POOL_WAIT = 5
 MAX_WORD_LENGTH = 64
+SEARCH_RESULT_LIMIT = 20
+SUGGESTION_LIMIT = 5
+TRANSLATE_MAX_TOKENS = 1000
+TRANSLATE_MAX_PHRASE_WORDS = 3
+TRANSLATION_CACHE_SIZE = 10000
+WORD_PAGE_SIZE = 50
+IMPORT_BATCH_SIZE = 1000
+IMPORT_COMMIT_ROWS = 50000
+EXPORT_FETCH_SIZE = 1000
 TOKEN_EXPIRATION = 5 * 60
+TOKEN_CACHE_SIZE = 10000
+KEY_RELOAD_INTERVAL = 1
+REVOCATION_REFRESH_INTERVAL = 1
+REVOCATION_SWEEP_INTERVAL = 60
+API_WORKERS = 8
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_CACHED_STATEMENTS = 256
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+API_MAX_BODY = 64 * 1024
+API_MAX_LIMIT = 1000
+PROFILE_SAMPLE_INTERVAL = 0.005
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_POLL_INTERVAL = 5
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BACKOFF_BASE = 2
+OUTBOX_BACKOFF_MAX = 15 * 60
+SMTP_TIMEOUT = 30
+SMTP_IDLE_CHECK = 60
+RESET_CODE_LENGTH = 6
+RESET_CODE_TTL = 10 * 60
+RESET_CODE_MAX_ATTEMPTS = 3
+RESET_CODE_SWEEP_INTERVAL = 60
+RATE_LIMIT_MAX_KEYS = 10000
+LOGIN_LIMIT_PER_USER = (5, 60)
+LOGIN_LIMIT_PER_CLIENT = (20, 60)
+SIGNUP_LIMIT_PER_CLIENT = (5, 10 * 60)
+RESET_LIMIT_PER_EMAIL = (3, 15 * 60)
+RESET_LIMIT_PER_CLIENT = (10, 15 * 60)
 
 PRIVATE_KEY_PATH = config('PRIVATE_KEY_PATH')
 PUBLIC_KEY_PATH = config('PUBLIC_KEY_PATH')
+PUBLIC_KEY_RING = config('PUBLIC_KEY_RING', default='')
 PRIVATE_KEY_PASSWORD = config('PRIVATE_KEY_PASSWORD')
+SIGNING_KEY_ID = config('SIGNING_KEY_ID', default='default')
+TOKEN_FORMAT = config('TOKEN_FORMAT', default='v2')
+API_HOST = config('API_HOST', default='127.0.0.1')
+API_PORT = config('API_PORT', default=8000, cast=int)
+QUERY_STATS_PATH = config('QUERY_STATS_PATH', default='')
+PROFILE_DIR = config('PROFILE_DIR', default='')
+PROFILE_MODE = config('PROFILE_MODE', default='sample')
+PROFILE_SLOW_MS = config('PROFILE_SLOW_MS', default=0, cast=float)
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=1.0, cast=float)
+RESET_CODE_BACKEND = config('RESET_CODE_BACKEND', default='memory')
+RESET_CODE_SECRET = config('RESET_CODE_SECRET', default='')
+SMTP_HOST = config('SMTP_HOST', default='smtp.gmail.com')
+SMTP_PORT = config('SMTP_PORT', default=465, cast=int)
+SMTP_USE_SSL = config('SMTP_USE_SSL', default=True, cast=bool)
 SENDER_EMAIL = config('SENDER_EMAIL')
 APP_PASSWORD = config('APP_PASSWORD')
\ No newline at end of file
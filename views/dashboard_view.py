@@ -3,6 +3,16 @@ import sqlite3
 from db.role import RoleRepository
 from logic.actions import DictionaryActions, UserActions, BlockActions, TokenValidator
 
+def page_dictionary(dict_actions, auth, author_username=None):
+    after_id = 0
+    while True:
+        after_id = dict_actions.print_dictionary_page(after_id, author_username=author_username, auth=auth)
+        if not after_id:
+            return
+        if input("Press Enter for more, or q to stop: ").strip().lower() == "q":
+            return
+
+
 def main_menu_flow(cursor, token):
     role_repo = RoleRepository(cursor)
     dict_actions = DictionaryActions(cursor)
@@ -13,6 +23,8 @@ def main_menu_flow(cursor, token):
 1) Show dict
 2) Translate from English to Farsi
 3) Translate from Farsi to English
+7) Search dictionary
+8) Translate a sentence
 9) Log out
 0) Exit the program
 """
@@ -24,6 +36,8 @@ def main_menu_flow(cursor, token):
 4) Add a new word
 5) Edit an existing word
 6) Delete a word
+7) Search dictionary
+8) Translate a sentence
 9) Log out
 0) Exit the program
 """
@@ -35,6 +49,8 @@ def main_menu_flow(cursor, token):
 4) Add a new word
 5) Edit an existing word
 6) Delete a word
+7) Search dictionary
+8) Translate a sentence
 11) Show users
 12) Create a new user
 13) Change authorization
@@ -48,13 +64,13 @@ def main_menu_flow(cursor, token):
     while True:
         time.sleep(2)
 
-        if not TokenValidator.is_token_valid(token):
+        auth = TokenValidator.decode(token, dict_actions.revocations)
+        if auth is None:
             print("Session expired. Please log in again.")
             return True
 
-        payload = TokenValidator.extract_payload(token)
-        role = payload["role"]
-        username = payload["sub"]
+        role = auth.role
+        username = auth.subject
 
         if role == "normal_user":
             print(menu_normal_user)
@@ -73,26 +89,26 @@ def main_menu_flow(cursor, token):
             return True
 
         elif choice == "1":
-            dict_actions.print_all_dictionary_words(token=token)
+            page_dictionary(dict_actions, auth)
 
         elif choice == "2":
             en_word = input("Enter English word: ").strip()
-            dict_actions.show_fa_translations(en_word, token=token)
+            dict_actions.show_fa_translations(en_word, auth=auth)
 
         elif choice == "3":
             fa_word = input("Enter Persian word: ").strip()
-            dict_actions.show_en_translations(fa_word, token=token)
+            dict_actions.show_en_translations(fa_word, auth=auth)
 
         elif choice == "4":
             en_word = input("Enter English word: ").strip()
             fa_word = input("Enter Persian translation: ").strip()
             try:
-                dict_actions.add_new_word(en_word, fa_word, author_username=username, token=token)
+                dict_actions.add_new_word(en_word, fa_word, author_username=username, auth=auth)
             except sqlite3.IntegrityError:
                 print("Duplicate value en-word and fa-word!")
 
         elif choice == "5":
-            dict_actions.print_all_dictionary_words(token=token)
+            page_dictionary(dict_actions, auth, author_username=None if role == "admin" else username)
             try:
                 word_id = int(input("Enter word ID to edit: ").strip())
             except ValueError:
@@ -102,24 +118,32 @@ def main_menu_flow(cursor, token):
             new_fa = input("Enter new Persian word: ").strip()
 
             if role == "admin":
-                dict_actions.edit_any_word(word_id, new_en, new_fa, token=token)
+                dict_actions.edit_any_word(word_id, new_en, new_fa, auth=auth)
             else:
-                dict_actions.edit_own_word(word_id, new_en, new_fa, author_username=username, token=token)
+                dict_actions.edit_own_word(word_id, new_en, new_fa, author_username=username, auth=auth)
 
         elif choice == "6":
-            dict_actions.print_all_dictionary_words(token=token)
+            page_dictionary(dict_actions, auth, author_username=None if role == "admin" else username)
             try:
                 word_id = int(input("Enter word ID to delete: ").strip())
             except ValueError:
                 print("Invalid word ID format.")
                 continue
             if role == "admin":
-                dict_actions.delete_any_word(word_id, token=token)
+                dict_actions.delete_any_word(word_id, auth=auth)
             else:
-                dict_actions.delete_own_word(word_id, author_username=username, token=token)
+                dict_actions.delete_own_word(word_id, author_username=username, auth=auth)
+
+        elif choice == "7":
+            text = input("Enter search text: ").strip()
+            dict_actions.search(text, auth=auth)
+
+        elif choice == "8":
+            text = input("Enter a sentence (English or Persian): ").strip()
+            dict_actions.translate_text(text, auth=auth)
 
         elif choice == "11":
-            user_actions.show_all_users(current_username=username, token=token)
+            user_actions.show_all_users(current_username=username, auth=auth)
 
         elif choice == "12":
             new_username = input("Enter new username: ").strip()
@@ -149,10 +173,10 @@ def main_menu_flow(cursor, token):
             user_actions.create_new_user(new_username, new_email, new_password, role_id,
                                          current_admin_username=username,
                                          confirm_admin_downgrade=confirm,
-                                         token=token)
+                                         auth=auth)
 
         elif choice == "13":
-            user_actions.show_all_users(current_username=username, token=token)
+            user_actions.show_all_users(current_username=username, auth=auth)
 
             try:
                 target_id = int(input("Enter user ID to change role: ").strip())
@@ -183,13 +207,13 @@ def main_menu_flow(cursor, token):
             user_actions.change_user_role(target_user_id=target_id, new_role_id=role_id,
                                           current_admin_username=username,
                                           confirm_admin_downgrade=confirm,
-                                          token=token)
+                                          auth=auth)
 
         elif choice == "14":
-            block_actions.show_blocked_users(token=token)
+            block_actions.show_blocked_users(auth=auth)
 
         elif choice == "15":
-            block_actions.show_unblocked_users(current_admin_username=username, token=token)
+            block_actions.show_unblocked_users(current_admin_username=username, auth=auth)
             try:
                 target_id = int(input("Enter user ID to block: ").strip())
             except ValueError:
@@ -197,10 +221,10 @@ def main_menu_flow(cursor, token):
                 continue
             block_actions.block_user_by_id(target_user_id=target_id,
                                            current_admin_username=username,
-                                           token=token)
+                                           auth=auth)
 
         elif choice == "16":
-            block_actions.show_users_to_unblock(current_admin_username=username, token=token)
+            block_actions.show_users_to_unblock(current_admin_username=username, auth=auth)
             try:
                 target_id = int(input("Enter user ID to unblock: ").strip())
             except ValueError:
@@ -208,7 +232,7 @@ def main_menu_flow(cursor, token):
                 continue
             block_actions.unblock_user_by_id(target_user_id=target_id,
                                              current_admin_username=username,
-                                             token=token)
+                                             auth=auth)
 
         else:
             print("Invalid choice. Please try again.")
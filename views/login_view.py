@@ -1,5 +1,7 @@
 from db.user_db import UserRepository
 from logic.auth import TokenService, AuthService, PasswordResetService
+from logic.profiling import profiler
+from setting import RESET_CODE_MAX_ATTEMPTS
 
 def register_flow(cursor):
     user_repo = UserRepository(cursor)
@@ -20,7 +22,8 @@ def register_flow(cursor):
             try:
                 username = input("Username: ").strip()
                 password = input("Password: ").strip()
-                token = auth_service.login_user(username, password)
+                with profiler.profile("register_flow.login"):
+                    token = auth_service.login_user(username, password)
                 if token:
                     print("Login successful.")
                     return token
@@ -34,7 +37,8 @@ def register_flow(cursor):
                 username = input("Username: ").strip()
                 email = input("Email address: ").strip()
                 password = input("Password: ").strip()
-                token = auth_service.sign_in_user(username, email, password)
+                with profiler.profile("register_flow.sign_up"):
+                    token = auth_service.sign_in_user(username, email, password)
                 if token:
                     print("Registration successful.")
                     return token
@@ -46,14 +50,15 @@ def register_flow(cursor):
         elif choice == "3":
             try:
                 email = input("What's your email address: ").strip()
-                code = reset_service.initiate_password_reset(email)
-                if not code:
+                with profiler.profile("register_flow.initiate_reset"):
+                    started = reset_service.initiate_password_reset(email)
+                if not started:
                     print("Reset initiation failed (invalid email or user blocked).")
                     continue
 
-                for attempt in range(3):
+                for attempt in range(RESET_CODE_MAX_ATTEMPTS):
                     user_code = input("Enter the code sent to your email: ").strip()
-                    if reset_service.verify_reset_code(code, user_code):
+                    if reset_service.verify_reset_code(email, user_code):
                         break
                     print("Incorrect code.\n")
                 else:
@@ -61,7 +66,8 @@ def register_flow(cursor):
                     continue
 
                 new_password = input("Enter your new password: ").strip()
-                token = reset_service.complete_password_reset(email, new_password)
+                with profiler.profile("register_flow.complete_reset"):
+                    token = reset_service.complete_password_reset(email, new_password)
                 if token:
                     print("Password reset successful.")
                     return token